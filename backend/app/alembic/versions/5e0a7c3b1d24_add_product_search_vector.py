@@ -0,0 +1,27 @@
+"""Add product search vector
+
+Revision ID: 5e0a7c3b1d24
+Revises: b1f4c2d7e9a0
+Create Date: 2026-10-18 10:02:17.554128
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '5e0a7c3b1d24'
+down_revision = 'b1f4c2d7e9a0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('product', sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed("setweight(to_tsvector('english', coalesce(name, '')), 'A') || setweight(to_tsvector('english', coalesce(description, '')), 'B')", persisted=True), nullable=True))
+    op.create_index('ix_product_search_vector', 'product', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade():
+    op.drop_index('ix_product_search_vector', table_name='product', postgresql_using='gin')
+    op.drop_column('product', 'search_vector')
@@ -0,0 +1,107 @@
+"""Partition order and orderitem by month
+
+Revision ID: 7c1e9a4f2b60
+Revises: f6a2d9c4b813
+Create Date: 2026-10-18 15:41:09.203518
+
+"""
+from datetime import UTC, date, datetime
+
+from alembic import context, op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '7c1e9a4f2b60'
+down_revision = 'f6a2d9c4b813'
+branch_labels = None
+depends_on = None
+
+# Postgres can't partition a table in place, so each table is copied into a
+# partitioned one and swapped. Both are locked against writes meanwhile.
+TABLES = ['order', 'orderitem']
+# Months created past the current one, later ones come from init_db and
+# app/archive_orders.py
+MONTHS_AHEAD = 3
+
+INDEXES = {
+    'order': [
+        ('ix_order_created_at_id', ['created_at', 'id']),
+        ('ix_order_customer_id_created_at_id', ['customer_id', 'created_at', 'id']),
+        ('ix_order_shipping_address_id', ['shipping_address_id']),
+    ],
+    'orderitem': [
+        ('ix_orderitem_order_id', ['order_id']),
+        ('ix_orderitem_product_id', ['product_id']),
+    ],
+}
+FOREIGN_KEYS = {
+    'order': [
+        ('order_customer_id_fkey', 'user', ['customer_id'], 'SET NULL'),
+        ('order_shipping_address_id_fkey', 'address', ['shipping_address_id'], None),
+    ],
+    'orderitem': [
+        ('orderitem_product_id_fkey', 'product', ['product_id'], 'SET NULL'),
+    ],
+}
+
+
+def add_months(month, months):
+    year, index = divmod(month.year * 12 + month.month - 1 + months, 12)
+    return date(year, index + 1, 1)
+
+
+def epoch(month):
+    return int(datetime(month.year, month.month, 1, tzinfo=UTC).timestamp())
+
+
+def swap(table, *, partitioned):
+    """
+    Copy `table` into a new table with the same columns, drop it and give the
+    copy its name, then rebuild the primary key, indexes and foreign keys.
+    """
+    conn = op.get_bind()
+    copy = f'{table}_copy'
+    partition_by = ' PARTITION BY RANGE (created_at)' if partitioned else ''
+    op.execute(f'CREATE TABLE "{copy}" (LIKE "{table}" INCLUDING DEFAULTS){partition_by}')
+
+    if partitioned:
+        # with --sql there's no data to look at, start at the current month
+        first = None if context.is_offline_mode() else conn.execute(sa.text(f'SELECT min(created_at) FROM "{table}"')).scalar()
+        this_month = datetime.now(UTC).date().replace(day=1)
+        month = datetime.fromtimestamp(first, UTC).date().replace(day=1) if first is not None else this_month
+        while month <= add_months(this_month, MONTHS_AHEAD):
+            next_month = add_months(month, 1)
+            op.execute(
+                f'CREATE TABLE "{table}_{month:%Y_%m}" PARTITION OF "{copy}" '
+                f'FOR VALUES FROM ({epoch(month)}) TO ({epoch(next_month)})'
+            )
+            month = next_month
+        op.execute(f'CREATE TABLE "{table}_default" PARTITION OF "{copy}" DEFAULT')
+
+    op.execute(f'INSERT INTO "{copy}" SELECT * FROM "{table}"')
+    op.drop_table(table)
+    op.rename_table(copy, table)
+    op.create_primary_key(f'{table}_pkey', table, ['id', 'created_at'] if partitioned else ['id'])
+    for name, columns in INDEXES[table]:
+        op.create_index(name, table, columns, unique=False)
+    for name, referent, columns, ondelete in FOREIGN_KEYS[table]:
+        op.create_foreign_key(name, table, referent, columns, ['id'], ondelete=ondelete)
+
+
+def upgrade():
+    op.execute('LOCK TABLE "order", orderitem IN ACCESS EXCLUSIVE MODE')
+    # A partitioned table can only be referenced through its whole partition
+    # key, items keep order_id without a constraint
+    op.drop_constraint('orderitem_order_id_fkey', 'orderitem', type_='foreignkey')
+    for table in TABLES:
+        swap(table, partitioned=True)
+
+
+def downgrade():
+    op.execute('LOCK TABLE "order", orderitem IN ACCESS EXCLUSIVE MODE')
+    for table in TABLES:
+        swap(table, partitioned=False)
+    # not validated, items of archived orders may be left behind
+    op.create_foreign_key('orderitem_order_id_fkey', 'orderitem', 'order', ['order_id'], ['id'], ondelete='CASCADE', postgresql_not_valid=True)
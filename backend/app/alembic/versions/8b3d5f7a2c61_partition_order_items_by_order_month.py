@@ -0,0 +1,95 @@
+"""Partition order items by their order's month
+
+Revision ID: 8b3d5f7a2c61
+Revises: 2d8f6b1e4c90
+Create Date: 2026-10-18 22:16:48.072915
+
+"""
+from datetime import UTC, date, datetime
+
+from alembic import context, op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '8b3d5f7a2c61'
+down_revision = '2d8f6b1e4c90'
+branch_labels = None
+depends_on = None
+
+# Items get their order's created_at and are partitioned on it, so they can
+# reference the order through its whole partition key and share its month.
+# Months created past the current one, like 7c1e9a4f2b60
+MONTHS_AHEAD = 3
+
+
+def add_months(month, months):
+    year, index = divmod(month.year * 12 + month.month - 1 + months, 12)
+    return date(year, index + 1, 1)
+
+
+def epoch(month):
+    return int(datetime(month.year, month.month, 1, tzinfo=UTC).timestamp())
+
+
+def swap(key, indexes):
+    """
+    Copy orderitem into a new table partitioned by month on `key`, drop it and
+    give the copy and its partitions their names, then rebuild the primary key,
+    `indexes` and the product foreign key.
+    """
+    conn = op.get_bind()
+    op.execute(f'CREATE TABLE orderitem_copy (LIKE orderitem INCLUDING DEFAULTS) PARTITION BY RANGE ({key})')
+
+    # with --sql there's no data to look at, start at the current month
+    first = None if context.is_offline_mode() else conn.execute(sa.text(f'SELECT min({key}) FROM orderitem')).scalar()
+    this_month = datetime.now(UTC).date().replace(day=1)
+    month = datetime.fromtimestamp(first, UTC).date().replace(day=1) if first is not None else this_month
+    partitions = ['default']
+    while month <= add_months(this_month, MONTHS_AHEAD):
+        next_month = add_months(month, 1)
+        partitions.append(f'{month:%Y_%m}')
+        op.execute(
+            f'CREATE TABLE "orderitem_copy_{month:%Y_%m}" PARTITION OF orderitem_copy '
+            f'FOR VALUES FROM ({epoch(month)}) TO ({epoch(next_month)})'
+        )
+        month = next_month
+    op.execute('CREATE TABLE orderitem_copy_default PARTITION OF orderitem_copy DEFAULT')
+
+    op.execute('INSERT INTO orderitem_copy SELECT * FROM orderitem')
+    op.drop_table('orderitem')
+    op.rename_table('orderitem_copy', 'orderitem')
+    for suffix in partitions:
+        op.rename_table(f'orderitem_copy_{suffix}', f'orderitem_{suffix}')
+    op.create_primary_key('orderitem_pkey', 'orderitem', ['id', key])
+    for name, columns in indexes:
+        op.create_index(name, 'orderitem', columns, unique=False)
+    op.create_foreign_key('orderitem_product_id_fkey', 'orderitem', 'product', ['product_id'], ['id'], ondelete='SET NULL')
+
+
+def upgrade():
+    op.execute('LOCK TABLE "order", orderitem IN ACCESS EXCLUSIVE MODE')
+    op.add_column('orderitem', sa.Column('order_created_at', sa.Integer(), nullable=True))
+    op.execute(
+        'UPDATE orderitem SET order_created_at = o.created_at '
+        'FROM "order" o WHERE o.id = orderitem.order_id'
+    )
+    # items whose order is gone can't reference it
+    op.execute('DELETE FROM orderitem WHERE order_created_at IS NULL')
+    op.alter_column('orderitem', 'order_created_at', nullable=False)
+    swap('order_created_at', [
+        ('ix_orderitem_order_id_order_created_at', ['order_id', 'order_created_at']),
+        ('ix_orderitem_product_id', ['product_id']),
+    ])
+    op.create_foreign_key('orderitem_order_id_order_created_at_fkey', 'orderitem', 'order', ['order_id', 'order_created_at'], ['id', 'created_at'], ondelete='CASCADE')
+
+
+def downgrade():
+    op.execute('LOCK TABLE "order", orderitem IN ACCESS EXCLUSIVE MODE')
+    op.drop_constraint('orderitem_order_id_order_created_at_fkey', 'orderitem', type_='foreignkey')
+    swap('created_at', [
+        ('ix_orderitem_order_id', ['order_id']),
+        ('ix_orderitem_product_id', ['product_id']),
+    ])
+    op.drop_column('orderitem', 'order_created_at')
@@ -0,0 +1,30 @@
+"""Add product review aggregates
+
+Revision ID: a7d3e6f0c851
+Revises: 5e0a7c3b1d24
+Create Date: 2026-10-18 11:26:40.917352
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'a7d3e6f0c851'
+down_revision = '5e0a7c3b1d24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('product', sa.Column('rating_avg', sa.Float(), server_default='0', nullable=False))
+    op.add_column('product', sa.Column('rating_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('product', sa.Column('rating_histogram', postgresql.ARRAY(sa.Integer()), server_default='{0,0,0,0,0,0,0,0,0,0,0}', nullable=False))
+    # existing reviews are folded in with `python -m app.backfill_ratings`
+
+
+def downgrade():
+    op.drop_column('product', 'rating_histogram')
+    op.drop_column('product', 'rating_count')
+    op.drop_column('product', 'rating_avg')
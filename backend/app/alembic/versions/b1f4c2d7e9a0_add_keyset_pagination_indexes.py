@@ -0,0 +1,35 @@
+"""Add keyset pagination indexes
+
+Revision ID: b1f4c2d7e9a0
+Revises: 732337727baf
+Create Date: 2026-10-18 09:12:44.103517
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'b1f4c2d7e9a0'
+down_revision = '732337727baf'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_product_created_at_id', 'product', ['created_at', 'id'], unique=False)
+    op.create_index('ix_user_created_at_id', 'user', ['created_at', 'id'], unique=False)
+    op.create_index('ix_cart_created_at_id', 'cart', ['created_at', 'id'], unique=False)
+    op.create_index('ix_cart_customer_id_created_at_id', 'cart', ['customer_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_order_created_at_id', 'order', ['created_at', 'id'], unique=False)
+    op.create_index('ix_order_customer_id_created_at_id', 'order', ['customer_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_order_customer_id_created_at_id', table_name='order')
+    op.drop_index('ix_order_created_at_id', table_name='order')
+    op.drop_index('ix_cart_customer_id_created_at_id', table_name='cart')
+    op.drop_index('ix_cart_created_at_id', table_name='cart')
+    op.drop_index('ix_user_created_at_id', table_name='user')
+    op.drop_index('ix_product_created_at_id', table_name='product')
@@ -0,0 +1,27 @@
+"""Add review listing indexes
+
+Revision ID: c4b8e2a91f37
+Revises: a7d3e6f0c851
+Create Date: 2026-10-18 12:08:53.260194
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4b8e2a91f37'
+down_revision = 'a7d3e6f0c851'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_review_product_id_created_at_id', 'review', ['product_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_review_product_id_rating_id', 'review', ['product_id', 'rating', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_review_product_id_rating_id', table_name='review')
+    op.drop_index('ix_review_product_id_created_at_id', table_name='review')
@@ -0,0 +1,29 @@
+"""Add catalog filter indexes
+
+Revision ID: e93f1b6d0a58
+Revises: c4b8e2a91f37
+Create Date: 2026-10-18 13:41:05.782631
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'e93f1b6d0a58'
+down_revision = 'c4b8e2a91f37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_productcategorylink_category_id_product_id', 'productcategorylink', ['category_id', 'product_id'], unique=False)
+    op.create_index('ix_product_currency_price', 'product', ['currency', 'price'], unique=False)
+    op.create_index('ix_product_in_stock_created_at_id', 'product', ['created_at', 'id'], unique=False, postgresql_where=sa.text('available_quantity > 0'))
+
+
+def downgrade():
+    op.drop_index('ix_product_in_stock_created_at_id', table_name='product', postgresql_where=sa.text('available_quantity > 0'))
+    op.drop_index('ix_product_currency_price', table_name='product')
+    op.drop_index('ix_productcategorylink_category_id_product_id', table_name='productcategorylink')
@@ -0,0 +1,42 @@
+"""Add foreign key indexes
+
+Revision ID: f6a2d9c4b813
+Revises: e93f1b6d0a58
+Create Date: 2026-10-18 15:02:37.418265
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'f6a2d9c4b813'
+down_revision = 'e93f1b6d0a58'
+branch_labels = None
+depends_on = None
+
+# CREATE INDEX CONCURRENTLY can't run in a transaction, so these run in an
+# autocommit block and don't lock the tables against writes while building
+INDEXES = [
+    ('ix_address_customer_id', 'address', ['customer_id']),
+    ('ix_cartitem_cart_id', 'cartitem', ['cart_id']),
+    ('ix_cartitem_product_id', 'cartitem', ['product_id']),
+    ('ix_order_shipping_address_id', 'order', ['shipping_address_id']),
+    ('ix_orderitem_order_id', 'orderitem', ['order_id']),
+    ('ix_orderitem_product_id', 'orderitem', ['product_id']),
+    ('ix_productcategorylink_product_id', 'productcategorylink', ['product_id']),
+    ('ix_review_customer_id', 'review', ['customer_id']),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -1,18 +1,24 @@
-from collections.abc import Generator
+import hashlib
+import math
+import time
+import uuid
+from collections.abc import AsyncGenerator, Generator
 from typing import Annotated
 
 import jwt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, Response, status
 from fastapi.security import OAuth2PasswordBearer, SecurityScopes
 from jwt.exceptions import InvalidTokenError
 from loguru import logger
 from pydantic import ValidationError
-from sqlmodel import Session
+from sqlmodel import Session, SQLModel, col, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core import security
+from app.core.cache import cache_user, token_cache, user_cache
 from app.core.config import settings
-from app.core.db import engine
-from app.models import TokenPayload, User
+from app.core.db import async_engine, engine, replica_router
+from app.models import TableChange, TableVersion, TokenPayload, User
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/login/access-token",
@@ -20,36 +26,82 @@ reusable_oauth2 = OAuth2PasswordBearer(
 )
 
 
+# Objects stay loaded after commit, crud.save relies on RETURNING to keep them
+# in sync with their rows instead of reloading them
 def get_db() -> Generator[Session, None, None]:
-    with Session(engine) as session:
+    with Session(engine, expire_on_commit=False) as session:
+        yield session
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
         yield session
 
 
 SessionDep = Annotated[Session, Depends(get_db)]
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_db)]
 TokenDep = Annotated[str, Depends(reusable_oauth2)]
 
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
 
-def get_current_user(
-    security_scopes: SecurityScopes, session: SessionDep, token: TokenDep
-) -> User:
-    if security_scopes.scope_str:
-        authenticate_value = f"Bearer scope={security_scopes.scope_str}"
-    else:
-        authenticate_value = "Bearer"
-    scope_header = {"WWW-Authenticate": authenticate_value}
+
+def decode_token(token: str, headers: dict[str, str] | None = None) -> TokenPayload:
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
         )
-        token_data = TokenPayload.model_validate(payload)
+        return TokenPayload.model_validate(payload)
     except (InvalidTokenError, ValidationError) as ex:
         logger.exception("something went wrong validating credentials")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
-            headers=scope_header,
+            headers=headers,
         ) from ex
-    user = session.get(User, token_data.sub)
+
+
+def get_token_data(
+    request: Request, token: str, headers: dict[str, str] | None = None
+) -> TokenPayload:
+    """
+    The verified payload of `token`, decoded at most once per request.
+
+    Payloads are also kept process-wide until the token expires, keyed by a
+    digest of the whole signed token so nothing but that exact token hits.
+    """
+    token_data: TokenPayload | None = getattr(request.state, "token_data", None)
+    if token_data is not None:
+        return token_data
+    digest = hashlib.sha256(token.encode()).hexdigest()
+    token_data = token_cache.get(digest)
+    if token_data is None:
+        token_data = decode_token(token, headers)
+        if (ttl := token_data.exp - time.time()) > 0:
+            token_cache.set(digest, token_data, ttl=ttl)
+    request.state.token_data = token_data
+    return token_data
+
+
+def request_user(request: Request, session: Session | AsyncSession) -> User | None:
+    # resolved by an earlier dependency of this request, on the same session
+    user: User | None = getattr(request.state, "user", None)
+    return user if user is not None and user in session else None
+
+
+def authenticate_header(security_scopes: SecurityScopes) -> dict[str, str]:
+    if security_scopes.scope_str:
+        authenticate_value = f"Bearer scope={security_scopes.scope_str}"
+    else:
+        authenticate_value = "Bearer"
+    return {"WWW-Authenticate": authenticate_value}
+
+
+def check_user(
+    user: User | None,
+    token_data: TokenPayload,
+    security_scopes: SecurityScopes,
+    scope_header: dict[str, str],
+) -> User:
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -73,17 +125,200 @@ def get_current_user(
     return user
 
 
-def get_scopes(token: TokenDep):
+def load_user(session: Session, id: str | uuid.UUID | None) -> User | None:
+    """
+    The user with `id`, from the principal cache when possible. A cached
+    snapshot is merged into `session` with load=False, which attaches a copy
+    without querying.
+    """
+    if id and (snapshot := user_cache.get(str(id))) is not None:
+        return session.merge(snapshot, load=False)
+    user = session.get(User, id)
+    if user:
+        cache_user(user)
+    return user
+
+
+async def load_user_async(
+    session: AsyncSession, id: str | uuid.UUID | None
+) -> User | None:
+    if id and (snapshot := user_cache.get(str(id))) is not None:
+        return await session.merge(snapshot, load=False)
+    user = await session.get(User, id)
+    if user:
+        cache_user(user)
+    return user
+
+
+# Epoch second until which a client's reads go to the primary, set when it
+# writes. Carried by the client so it holds whichever worker serves the read.
+PRIMARY_UNTIL_COOKIE = "primary_until"
+
+
+def pin_primary(response: Response) -> None:
+    """
+    Keep the client's reads on the primary for PRIMARY_STICKINESS seconds,
+    until replicas have replayed its write.
+    """
+    if not replica_router.replicas:
+        return
+    stickiness = math.ceil(settings.PRIMARY_STICKINESS)
+    response.set_cookie(
+        PRIMARY_UNTIL_COOKIE,
+        str(int(time.time()) + stickiness),
+        max_age=stickiness,
+        httponly=True,
+        secure=settings.ENVIRONMENT != "local",
+        samesite="lax",
+    )
+
+
+def is_pinned(request: Request) -> bool:
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
+        until = int(request.cookies.get(PRIMARY_UNTIL_COOKIE, ""))
+    except ValueError:
+        return False
+    # a forged cookie can't pin reads for longer than a write would
+    now = time.time()
+    return now < until <= now + math.ceil(settings.PRIMARY_STICKINESS)
+
+
+def get_current_user(
+    request: Request,
+    response: Response,
+    security_scopes: SecurityScopes,
+    session: SessionDep,
+    token: TokenDep,
+) -> User:
+    scope_header = authenticate_header(security_scopes)
+    token_data = get_token_data(request, token, scope_header)
+    user = request_user(request, session) or load_user(session, token_data.sub)
+    user = request.state.user = check_user(
+        user, token_data, security_scopes, scope_header
+    )
+    if request.method not in SAFE_METHODS:
+        # keep the user's next reads on the primary so they see this write
+        pin_primary(response)
+    return user
+
+
+def get_current_user_fresh(
+    request: Request,
+    response: Response,
+    security_scopes: SecurityScopes,
+    session: SessionDep,
+    token: TokenDep,
+) -> User:
+    """
+    Same checks as get_current_user on the user's row rather than the
+    principal cache, for routes acting on the account itself, so a user
+    deactivated, deleted or given a new password elsewhere is seen at once.
+    """
+    scope_header = authenticate_header(security_scopes)
+    token_data = get_token_data(request, token, scope_header)
+    # reloads a copy merged from the cache earlier in the request too
+    user = session.get(User, token_data.sub, populate_existing=True)
+    if user:
+        cache_user(user)
+    user = request.state.user = check_user(
+        user, token_data, security_scopes, scope_header
+    )
+    if request.method not in SAFE_METHODS:
+        pin_primary(response)
+    return user
+
+
+async def get_current_user_async(
+    request: Request,
+    response: Response,
+    security_scopes: SecurityScopes,
+    session: AsyncSessionDep,
+    token: TokenDep,
+) -> User:
+    """
+    Same checks as get_current_user, loading the user on the async engine.
+    """
+    scope_header = authenticate_header(security_scopes)
+    token_data = get_token_data(request, token, scope_header)
+    user = request_user(request, session) or await load_user_async(
+        session, token_data.sub
+    )
+    user = request.state.user = check_user(
+        user, token_data, security_scopes, scope_header
+    )
+    if request.method not in SAFE_METHODS:
+        pin_primary(response)
+    return user
+
+
+def get_scopes(request: Request, token: TokenDep):
+    return get_token_data(request, token).scopes
+
+
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Session for safe read-only routes, on a replica unless the caller wrote
+    recently or no replica is healthy and caught up.
+    """
+    engine = await replica_router.choose(primary=is_pinned(request))
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        yield session
+
+
+ReadSessionDep = Annotated[AsyncSession, Depends(get_read_db)]
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(",")
+    )
+
+
+class TableETag:
+    """
+    Strong ETag over the tables a read is built from.
+
+    The tag is made of the tables' change counters, which a trigger bumps
+    with every transaction that writes them, so it changes with every write
+    however close together. Writers each add a row of their own rather than
+    updating a shared one, see the tableversion migrations, and product
+    review aggregates don't count as a write. A matching If-None-Match is
+    answered with a 304 before the route loads or serializes anything.
+
+    The tag is returned for the route to key its cached bodies on, a body is
+    then only served under the tag it was built at. It shares the route's
+    read session, so the tag and the body always come from the same database.
+    """
+
+    def __init__(self, *models: type[SQLModel]) -> None:
+        self.tables = [str(model.__tablename__) for model in models]
+
+    async def versions(self, session: AsyncSession) -> str:
+        changes = (
+            select(func.count())
+            .where(TableChange.table_name == TableVersion.table_name)
+            .scalar_subquery()
         )
-        token_data = TokenPayload.model_validate(payload)
-    except (InvalidTokenError, ValidationError) as ex:
-        logger.exception("something went wrong validating credentials")
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-        ) from ex
-    else:
-        return token_data.scopes
+        statement = select(
+            TableVersion.table_name, col(TableVersion.version) + changes
+        ).where(col(TableVersion.table_name).in_(self.tables))
+        versions = dict((await session.exec(statement)).all())
+        return ".".join(str(versions.get(t, 0)) for t in self.tables)
+
+    def respond(self, request: Request, response: Response, version: str) -> str:
+        etag = f'"{version}"'
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            raise HTTPException(
+                status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+            )
+        response.headers["ETag"] = etag
+        return etag
+
+    async def __call__(
+        self, request: Request, response: Response, session: ReadSessionDep
+    ) -> str:
+        return self.respond(request, response, await self.versions(session))
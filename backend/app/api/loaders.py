@@ -0,0 +1,56 @@
+from typing import Any, TypeVar, cast
+
+from sqlalchemy.orm import defer, joinedload, selectinload
+from sqlalchemy.orm.interfaces import ORMOption
+from sqlmodel import SQLModel
+
+from app.models import (
+    Cart,
+    CartItem,
+    CartItemPublic,
+    CartItemsPublic,
+    CartPublic,
+    CartsPublic,
+    Order,
+    OrderPublic,
+    OrdersPublic,
+    Product,
+    ProductPublic,
+    ProductsPublic,
+)
+
+S = TypeVar("S", bound=Any)
+
+# Relationships each response model serializes, loaded up front so FastAPI
+# doesn't lazy-load them row by row while building the response. Collections
+# use selectinload (one extra query per relationship), many-to-ones joinedload.
+# Columns no response renders, like the search vector, are deferred.
+RESPONSE_LOADERS: dict[type[SQLModel], tuple[ORMOption, ...]] = {
+    ProductPublic: (
+        selectinload(Product.categories),  # type: ignore[arg-type]
+        defer(Product.search_vector),  # type: ignore[arg-type]
+    ),
+    # CartPublic serializes cart items as plain rows, the product is only
+    # rendered through CartItemPublic
+    CartPublic: (selectinload(Cart.cart_items),),  # type: ignore[arg-type]
+    CartItemPublic: (joinedload(CartItem.product),),  # type: ignore[arg-type]
+    OrderPublic: (
+        selectinload(Order.items),  # type: ignore[arg-type]
+        joinedload(Order.shipping_address),  # type: ignore[arg-type]
+    ),
+}
+RESPONSE_LOADERS[ProductsPublic] = RESPONSE_LOADERS[ProductPublic]
+RESPONSE_LOADERS[CartsPublic] = RESPONSE_LOADERS[CartPublic]
+RESPONSE_LOADERS[CartItemsPublic] = RESPONSE_LOADERS[CartItemPublic]
+RESPONSE_LOADERS[OrdersPublic] = RESPONSE_LOADERS[OrderPublic]
+
+
+def load_options(response_model: type[SQLModel]) -> tuple[ORMOption, ...]:
+    return RESPONSE_LOADERS.get(response_model, ())
+
+
+def with_loaders(statement: S, response_model: type[SQLModel]) -> S:
+    """
+    Apply the loader options registered for `response_model` to `statement`.
+    """
+    return cast(S, statement.options(*load_options(response_model)))
@@ -0,0 +1,172 @@
+import base64
+import binascii
+import uuid
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any, Generic, TypeVar
+
+from fastapi import HTTPException, status
+from sqlalchemy import literal, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession as OrmAsyncSession
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import Session, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.sql.expression import SelectOfScalar
+
+from app.models import BaseTable
+
+T = TypeVar("T", bound=BaseTable)
+K = TypeVar("K", int, float)
+
+
+def encode_cursor(key: int | float, id: uuid.UUID) -> str:
+    raw = f"{key}:{id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(
+    cursor: str,
+    key_type: type[K] = int,
+) -> tuple[K, uuid.UUID]:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        key, id = base64.urlsafe_b64decode(padded).decode().split(":", 1)
+        return key_type(key), uuid.UUID(id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as ex:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        ) from ex
+
+
+def keyset(
+    statement: SelectOfScalar[T],
+    model: type[T],
+    *,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: str | None = None,
+    key: Any = None,
+    descending: bool = False,
+) -> tuple[SelectOfScalar[T], Any]:
+    """
+    Order and bound `statement` by (key, id), key defaulting to created_at.
+
+    When a cursor is given the page starts right after the row it points to,
+    so deep pages cost the same as the first one. Otherwise `skip` is used as
+    a plain offset for backwards compatibility. Returns the statement along
+    with the key column, which `next_page_cursor` needs.
+    """
+    key = model.created_at if key is None else key
+    order: Any = (key, model.id)
+    if descending:
+        statement = statement.order_by(*(column.desc() for column in order))
+    else:
+        statement = statement.order_by(*order)
+    statement = statement.limit(limit)
+
+    if cursor:
+        last_key, last_id = decode_cursor(cursor, key.type.python_type)
+        position, bound = tuple_(*order), tuple_(literal(last_key), literal(last_id))
+        statement = statement.where(
+            position < bound if descending else position > bound
+        )
+    else:
+        statement = statement.offset(skip)
+    return statement, key
+
+
+def next_page_cursor(rows: Sequence[T], key: Any, limit: int) -> str | None:
+    if not rows or len(rows) < limit:
+        return None
+    last_row = rows[-1]
+    return encode_cursor(key.type.python_type(getattr(last_row, key.key)), last_row.id)
+
+
+@dataclass
+class Page(Generic[T]):
+    rows: Sequence[T]
+    next_cursor: str | None
+    count: int | None = None
+
+
+def total_statement(statement: SelectOfScalar[T]) -> Any:
+    return select(func.count()).select_from(statement.order_by(None).subquery())
+
+
+def page_statement(
+    statement: SelectOfScalar[T],
+    model: type[T],
+    *,
+    include_count: bool,
+    **kwargs: Any,
+) -> tuple[Any, Any]:
+    """
+    The page query, with the total of the unpaged statement as an extra column
+    when `include_count` is set. The total is an uncorrelated subquery rather
+    than count(*) OVER (), which would only count the rows past the cursor.
+    """
+    total = total_statement(statement).scalar_subquery() if include_count else None
+    statement, key = keyset(statement, model, **kwargs)
+    if total is not None:
+        statement = statement.add_columns(total.label("total"))  # type: ignore[assignment]
+    return statement, key
+
+
+def needs_count_fallback(results: Sequence[Any], kwargs: dict[str, Any]) -> bool:
+    # an empty page past the end carries no total column to read it from
+    return not results and bool(kwargs.get("cursor") or kwargs.get("skip"))
+
+
+def paginate(
+    session: Session,
+    statement: SelectOfScalar[T],
+    model: type[T],
+    *,
+    limit: int = 100,
+    include_count: bool = False,
+    **kwargs: Any,
+) -> Page[T]:
+    """
+    Run a page of `statement`, see `keyset` for the arguments. With
+    `include_count` the total comes back in the same round trip.
+    """
+    page, key = page_statement(
+        statement, model, include_count=include_count, limit=limit, **kwargs
+    )
+    if not include_count:
+        rows = session.exec(page).all()
+        return Page(rows, next_page_cursor(rows, key, limit))
+
+    # Session.exec would run the page through .scalars() and drop the total
+    results = OrmSession.execute(session, page).all()
+    rows = [row for row, _ in results]
+    if needs_count_fallback(results, kwargs):
+        count = session.exec(total_statement(statement)).one()
+    else:
+        count = results[0][1] if results else 0
+    return Page(rows, next_page_cursor(rows, key, limit), count)
+
+
+async def paginate_async(
+    session: AsyncSession,
+    statement: SelectOfScalar[T],
+    model: type[T],
+    *,
+    limit: int = 100,
+    include_count: bool = False,
+    **kwargs: Any,
+) -> Page[T]:
+    page, key = page_statement(
+        statement, model, include_count=include_count, limit=limit, **kwargs
+    )
+    if not include_count:
+        rows = (await session.exec(page)).all()
+        return Page(rows, next_page_cursor(rows, key, limit))
+
+    results = (await OrmAsyncSession.execute(session, page)).all()
+    rows = [row for row, _ in results]
+    if needs_count_fallback(results, kwargs):
+        count = (await session.exec(total_statement(statement))).one()
+    else:
+        count = results[0][1] if results else 0
+    return Page(rows, next_page_cursor(rows, key, limit), count)
@@ -0,0 +1,146 @@
+import hashlib
+import math
+from collections.abc import Awaitable, Callable, Sequence
+from functools import cache
+from ipaddress import IPv4Network, IPv6Network, ip_address, ip_network
+
+from fastapi import HTTPException, Request, status
+
+from app.core.config import settings
+from app.core.db import async_engine
+from app.core.ratelimit import MemoryBackend, PostgresBackend, Rate, RateLimitBackend
+
+# Maps a request to the bucket it draws from, None skips the limit
+KeyFunc = Callable[[Request], Awaitable[str | None]]
+
+
+def get_backend() -> RateLimitBackend:
+    if settings.RATE_LIMIT_BACKEND == "postgres":
+        return PostgresBackend(async_engine)
+    return MemoryBackend()
+
+
+backend = get_backend()
+
+
+@cache
+def trusted_networks(hosts: tuple[str, ...]) -> list[IPv4Network | IPv6Network]:
+    return [ip_network(host, strict=False) for host in hosts if host != "*"]
+
+
+def is_trusted_proxy(host: str) -> bool:
+    hosts = tuple(settings.FORWARDED_ALLOW_IPS)
+    if "*" in hosts:
+        return True
+    try:
+        address = ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in trusted_networks(hosts))
+
+
+def client_host(request: Request) -> str | None:
+    """
+    The address of the client behind any trusted proxies: the last
+    X-Forwarded-For entry that isn't one of them, as the client can put
+    anything before it.
+    """
+    if request.client is None:
+        return None
+    host = request.client.host
+    hops = [
+        hop.strip()
+        for header in request.headers.getlist("x-forwarded-for")
+        for hop in header.split(",")
+    ]
+    while hops and is_trusted_proxy(host):
+        host = hops.pop() or host
+    return host
+
+
+async def client_ip(request: Request) -> str | None:
+    host = client_host(request)
+    return f"ip:{host}" if host else None
+
+
+def email_key(email: object) -> str | None:
+    """
+    Bucket key of an email address, as a digest: addresses come unvalidated
+    and unbounded from anonymous requests, and the key column holds 255.
+    """
+    if not isinstance(email, str):
+        return None
+    return f"email:{hashlib.sha256(email.strip().lower().encode()).hexdigest()}"
+
+
+def path_email(name: str) -> KeyFunc:
+    async def key(request: Request) -> str | None:
+        return email_key(request.path_params.get(name))
+
+    return key
+
+
+def form_email(name: str) -> KeyFunc:
+    # FastAPI has parsed the form already, the request caches it
+    async def key(request: Request) -> str | None:
+        return email_key((await request.form()).get(name))
+
+    return key
+
+
+def json_email(name: str) -> KeyFunc:
+    async def key(request: Request) -> str | None:
+        body = await request.json()
+        return email_key(body.get(name) if isinstance(body, dict) else None)
+
+    return key
+
+
+class RateLimit:
+    """
+    Dependency admitting a request only when each of its buckets, one per
+    (key function, rate) rule, has a token left. Otherwise it answers 429
+    with the seconds until they do in Retry-After, and takes no token, so a
+    rejected request doesn't drain the buckets that still had some.
+    """
+
+    def __init__(self, name: str, rules: Sequence[tuple[KeyFunc, str]]) -> None:
+        self.name = name
+        self.rules = [(key, Rate.parse(rate)) for key, rate in rules]
+
+    async def __call__(self, request: Request) -> None:
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        buckets = []
+        for key_func, rate in self.rules:
+            if (key := await key_func(request)) is not None:
+                buckets.append((f"{self.name}:{key}", rate))
+        if buckets and (wait := await backend.acquire(buckets)) > 0:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, try again later",
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+
+
+login_limit = RateLimit(
+    "login",
+    [
+        (client_ip, settings.LOGIN_RATE_LIMIT_IP),
+        (form_email("username"), settings.LOGIN_RATE_LIMIT_EMAIL),
+    ],
+)
+signup_limit = RateLimit(
+    "signup",
+    [
+        (client_ip, settings.SIGNUP_RATE_LIMIT_IP),
+        (json_email("email"), settings.SIGNUP_RATE_LIMIT_EMAIL),
+    ],
+)
+password_recovery_limit = RateLimit(
+    "password-recovery",
+    [
+        (client_ip, settings.PASSWORD_RECOVERY_RATE_LIMIT_IP),
+        (path_email("email"), settings.PASSWORD_RECOVERY_RATE_LIMIT_EMAIL),
+    ],
+)
@@ -3,6 +3,7 @@ from typing import Annotated, Any
 
 from fastapi import APIRouter, HTTPException, Security, status
 
+from app import crud
 from app.api.deps import (
     SessionDep,
     get_current_user,
@@ -49,9 +50,7 @@ def create_address(
     address = Address.model_validate(
         address_in, update={"customer_id": current_user.id}
     )
-    session.add(address)
-    session.commit()
-    session.refresh(address)
+    crud.save(session=session, db_obj=address)
     return address
 
 
@@ -77,9 +76,7 @@ def update_address(
         )
     update_dict = address_in.model_dump(exclude_unset=True)
     address.sqlmodel_update(update_dict)
-    session.add(address)
-    session.commit()
-    session.refresh(address)
+    crud.save(session=session, db_obj=address)
     return address
 
 
@@ -2,9 +2,17 @@ import uuid
 from typing import Annotated, Any
 
 from fastapi import APIRouter, HTTPException, Security, status
-from sqlmodel import func, select
-
-from app.api.deps import SessionDep, get_current_user
+from sqlmodel import select
+
+from app import crud
+from app.api.deps import (
+    ReadSessionDep,
+    SessionDep,
+    get_current_user,
+    get_current_user_async,
+)
+from app.api.loaders import load_options, with_loaders
+from app.api.pagination import paginate_async
 from app.models import (
     Cart,
     CartCreate,
@@ -23,49 +31,45 @@ router = APIRouter()
 
 
 @router.get("", response_model=CartsPublic)
-def read_carts(
-    session: SessionDep,
-    current_user: Annotated[User, Security(get_current_user, scopes=["cart"])],
+async def read_carts(
+    session: ReadSessionDep,
+    current_user: Annotated[User, Security(get_current_user_async, scopes=["cart"])],
     skip: int = 0,
     limit: int = 100,
+    cursor: str | None = None,
+    include_count: bool = True,
 ) -> Any:
     """
     Retrieve carts.
     """
 
-    if current_user.is_superuser:
-        count_statement = select(func.count()).select_from(Cart)
-        count = session.exec(count_statement).one()
-        statement = select(Cart).offset(skip).limit(limit)
-        carts = session.exec(statement).all()
-    else:
-        count_statement = (
-            select(func.count())
-            .select_from(Cart)
-            .where(Cart.customer_id == current_user.id)
-        )
-        count = session.exec(count_statement).one()
-        statement = (
-            select(Cart)
-            .where(Cart.customer_id == current_user.id)
-            .offset(skip)
-            .limit(limit)
-        )
-        carts = session.exec(statement).all()
+    statement = with_loaders(select(Cart), CartsPublic)
+    if not current_user.is_superuser:
+        statement = statement.where(Cart.customer_id == current_user.id)
+
+    page = await paginate_async(
+        session,
+        statement,
+        Cart,
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
+        include_count=include_count,
+    )
 
-    return CartsPublic(data=carts, count=count)  # type: ignore
+    return CartsPublic(data=page.rows, count=page.count, next_cursor=page.next_cursor)  # type: ignore
 
 
 @router.get("/{id}", response_model=CartPublic)
-def read_cart(
-    session: SessionDep,
-    current_user: Annotated[User, Security(get_current_user, scopes=["cart"])],
+async def read_cart(
+    session: ReadSessionDep,
+    current_user: Annotated[User, Security(get_current_user_async, scopes=["cart"])],
     id: uuid.UUID,
 ) -> Any:
     """
     Get cart by ID.
     """
-    cart = session.get(Cart, id)
+    cart = await session.get(Cart, id, options=load_options(CartPublic))
     if not cart:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Cart not found"
@@ -88,9 +92,7 @@ def create_cart(
     Create new cart.
     """
     cart = Cart.model_validate(cart_in, update={"customer_id": current_user.id})
-    session.add(cart)
-    session.commit()
-    session.refresh(cart)
+    crud.save(session=session, db_obj=cart)
     return cart
 
 
@@ -116,9 +118,7 @@ def update_cart(
         )
     update_dict = cart_in.model_dump(exclude_unset=True)
     cart.sqlmodel_update(update_dict)
-    session.add(cart)
-    session.commit()
-    session.refresh(cart)
+    crud.save(session=session, db_obj=cart)
     return cart
 
 
@@ -146,16 +146,18 @@ def delete_cart(
 
 
 @router.get("/{id}/items", response_model=CartItemsPublic)
-def read_cart_items(
-    session: SessionDep,
+async def read_cart_items(
+    session: ReadSessionDep,
     id: uuid.UUID,
-    current_user: Annotated[User, Security(get_current_user, scopes=["cart:item"])],
+    current_user: Annotated[
+        User, Security(get_current_user_async, scopes=["cart:item"])
+    ],
 ) -> Any:
     """
     Retrieve cart items.
     """
 
-    cart = session.get(Cart, id)
+    cart = await session.get(Cart, id)
     if not cart:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Cart not found"
@@ -164,14 +166,12 @@ def read_cart_items(
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions"
         )
-    count_statement = (
-        select(func.count()).select_from(CartItem).where(CartItem.cart_id == cart.id)
+    statement = with_loaders(
+        select(CartItem).where(CartItem.cart_id == cart.id), CartItemsPublic
     )
-    count = session.exec(count_statement).one()
-    statement = select(CartItem).where(CartItem.cart_id == cart.id)
-    items = session.exec(statement).all()
+    items = (await session.exec(statement)).all()
 
-    return CartItemsPublic(data=items, count=count)  # type: ignore
+    return CartItemsPublic(data=items, count=len(items))  # type: ignore
 
 
 @router.post("/{id}/items", response_model=CartItemPublic)
@@ -200,9 +200,7 @@ def create_cart_item(
     cart_item = CartItem.model_validate(
         item_in, update={"cart_id": cart.id, "product_id": product_id}
     )
-    session.add(cart_item)
-    session.commit()
-    session.refresh(cart_item)
+    crud.save(session=session, db_obj=cart_item)
     return cart_item
 
 
@@ -11,7 +11,9 @@ from app.api.deps import (
     get_current_user,
     get_scopes,
 )
+from app.api.ratelimit import login_limit, password_recovery_limit
 from app.core import security
+from app.core.cache import invalidate_user
 from app.core.config import settings
 from app.core.security import get_password_hash
 from app.models import Message, NewPassword, Token, User, UserPublic
@@ -25,7 +27,7 @@ from app.utils import (
 router = APIRouter()
 
 
-@router.post("/login/access-token")
+@router.post("/login/access-token", dependencies=[Depends(login_limit)])
 def login_access_token(
     session: SessionDep, form_data: Annotated[OAuth2PasswordRequestForm, Depends()]
 ) -> Token:
@@ -63,7 +65,9 @@ def test_token(
     return {"user": UserPublic(**current_user.model_dump()), "scopes": scopes}
 
 
-@router.post("/password-recovery/{email}")
+@router.post(
+    "/password-recovery/{email}", dependencies=[Depends(password_recovery_limit)]
+)
 def recover_password(email: str, session: SessionDep) -> Message:
     """
     Password Recovery
@@ -111,6 +115,7 @@ def reset_password(session: SessionDep, body: NewPassword) -> Message:
     user.hashed_password = hashed_password
     session.add(user)
     session.commit()
+    invalidate_user(user.id)
     return Message(message="Password updated successfully")
 
 
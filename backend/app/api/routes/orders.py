@@ -2,9 +2,17 @@ import uuid
 from typing import Annotated, Any
 
 from fastapi import APIRouter, HTTPException, Security, status
-from sqlmodel import func, select
+from sqlmodel import select
 
-from app.api.deps import SessionDep, get_current_user
+from app import crud
+from app.api.deps import (
+    ReadSessionDep,
+    SessionDep,
+    get_current_user,
+    get_current_user_async,
+)
+from app.api.loaders import load_options, with_loaders
+from app.api.pagination import paginate_async
 from app.models import (
     AddressesPublic,
     Message,
@@ -24,48 +32,44 @@ router = APIRouter()
 
 
 @router.get("", response_model=OrdersPublic)
-def read_orders(
-    session: SessionDep,
-    current_user: Annotated[User, Security(get_current_user, scopes=["order"])],
+async def read_orders(
+    session: ReadSessionDep,
+    current_user: Annotated[User, Security(get_current_user_async, scopes=["order"])],
     skip: int = 0,
     limit: int = 100,
+    cursor: str | None = None,
+    include_count: bool = True,
 ) -> Any:
     """
     Retrieve orders.
     """
-    if current_user.is_superuser:
-        count_statement = select(func.count()).select_from(Order)
-        count = session.exec(count_statement).one()
-        statement = select(Order).offset(skip).limit(limit)
-        orders = session.exec(statement).all()
-    else:
-        count_statement = (
-            select(func.count())
-            .select_from(Order)
-            .where(Order.customer_id == current_user.id)
-        )
-        count = session.exec(count_statement).one()
-        statement = (
-            select(Order)
-            .where(Order.customer_id == current_user.id)
-            .offset(skip)
-            .limit(limit)
-        )
-        orders = session.exec(statement).all()
+    statement = with_loaders(select(Order), OrdersPublic)
+    if not current_user.is_superuser:
+        statement = statement.where(Order.customer_id == current_user.id)
 
-    return OrdersPublic(data=orders, count=count)  # type: ignore
+    page = await paginate_async(
+        session,
+        statement,
+        Order,
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
+        include_count=include_count,
+    )
+
+    return OrdersPublic(data=page.rows, count=page.count, next_cursor=page.next_cursor)  # type: ignore
 
 
 @router.get("/{id}", response_model=OrderPublic)
-def read_order(
-    session: SessionDep,
-    current_user: Annotated[User, Security(get_current_user, scopes=["order"])],
+async def read_order(
+    session: ReadSessionDep,
+    current_user: Annotated[User, Security(get_current_user_async, scopes=["order"])],
     id: uuid.UUID,
 ) -> Any:
     """
     Get order by ID.
     """
-    order = session.get(Order, id)
+    order = await session.get(Order, id, options=load_options(OrderPublic))
     if not order:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Order not found"
@@ -88,9 +92,7 @@ def create_order(
     Create new order.
     """
     order = Order.model_validate(order_in, update={"customer_id": current_user.id})
-    session.add(order)
-    session.commit()
-    session.refresh(order)
+    crud.save(session=session, db_obj=order)
     return order
 
 
@@ -116,9 +118,7 @@ def update_order(
         )
     update_dict = order_in.model_dump(exclude_unset=True)
     order.sqlmodel_update(update_dict)
-    session.add(order)
-    session.commit()
-    session.refresh(order)
+    crud.save(session=session, db_obj=order)
     return order
 
 
@@ -146,16 +146,18 @@ def delete_order(
 
 
 @router.get("/{id}/items", response_model=OrderItemsPublic)
-def read_order_items(
-    session: SessionDep,
+async def read_order_items(
+    session: ReadSessionDep,
     id: uuid.UUID,
-    current_user: Annotated[User, Security(get_current_user, scopes=["order:item"])],
+    current_user: Annotated[
+        User, Security(get_current_user_async, scopes=["order:item"])
+    ],
 ) -> Any:
     """
     Retrieve order items.
     """
 
-    order = session.get(Order, id)
+    order = await session.get(Order, id)
     if not order:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Order not found"
@@ -164,16 +166,13 @@ def read_order_items(
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions"
         )
-    count_statement = (
-        select(func.count())
-        .select_from(OrderItem)
-        .where(OrderItem.order_id == order.id)
+    statement = select(OrderItem).where(
+        OrderItem.order_id == order.id,
+        OrderItem.order_created_at == order.created_at,
     )
-    count = session.exec(count_statement).one()
-    statement = select(OrderItem).where(OrderItem.order_id == order.id)
-    items = session.exec(statement).all()
+    items = (await session.exec(statement)).all()
 
-    return OrderItemsPublic(data=items, count=count)  # type: ignore
+    return OrderItemsPublic(data=items, count=len(items))  # type: ignore
 
 
 @router.post("/{id}/items", response_model=OrderItemPublic)
@@ -200,11 +199,14 @@ def create_order_item(
             status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions"
         )
     order_item = OrderItem.model_validate(
-        item_in, update={"order_id": order.id, "product_id": product_id}
+        item_in,
+        update={
+            "order_id": order.id,
+            "order_created_at": order.created_at,
+            "product_id": product_id,
+        },
     )
-    session.add(order_item)
-    session.commit()
-    session.refresh(order_item)
+    crud.save(session=session, db_obj=order_item)
     return order_item
 
 
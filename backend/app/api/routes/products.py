@@ -1,10 +1,34 @@
+import hashlib
 import uuid
+from decimal import Decimal
 from typing import Annotated, Any
 
-from fastapi import APIRouter, HTTPException, Security, status
-from sqlmodel import func, select
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    Security,
+    status,
+)
+from sqlalchemy import Float, cast
+from sqlalchemy.orm import defer
+from sqlmodel import Session, and_, col, exists, func, or_, select
 
-from app.api.deps import SessionDep, get_current_user
+from app import crud
+from app.api.deps import (
+    ReadSessionDep,
+    SessionDep,
+    TableETag,
+    get_current_user,
+    get_current_user_async,
+)
+from app.api.loaders import load_options, with_loaders
+from app.api.pagination import decode_cursor, encode_cursor, paginate_async
+from app.core.cache import invalidate_product, product_cache, product_page_cache
+from app.errors import MissingResourcesError
 from app.models import (
     CategoriesPublic,
     Category,
@@ -12,11 +36,13 @@ from app.models import (
     CategoryPublic,
     Message,
     Product,
+    ProductCategoryLink,
     ProductPublic,
     ProductsPublic,
     Review,
     ReviewCreate,
     ReviewPublic,
+    ReviewSort,
     ReviewsPublic,
     ReviewUpdate,
     User,
@@ -25,59 +51,303 @@ from app.models import (
 router = APIRouter()
 
 
+catalog_etag = TableETag(Product, Category, ProductCategoryLink)
+category_etag = TableETag(Category)
+
+
+async def product_etag(
+    request: Request, response: Response, session: ReadSessionDep, id: uuid.UUID
+) -> str:
+    """
+    The catalog tag plus a digest of one product's review aggregates, which
+    the catalog versions leave out so reviews don't throw away every cached
+    page. List pages carry the aggregates as of their last catalog write.
+    """
+    statement = select(
+        Product.updated_at,
+        Product.rating_count,
+        Product.rating_avg,
+        Product.rating_histogram,
+    ).where(Product.id == id)
+    aggregates = (await session.exec(statement)).first()
+    digest = hashlib.sha256(repr(aggregates).encode()).hexdigest()[:16]
+    version = await catalog_etag.versions(session)
+    return catalog_etag.respond(request, response, f"{version}.{digest}")
+
+
 @router.get(
     "",
-    dependencies=[Security(get_current_user, scopes=["product"])],
+    dependencies=[Security(get_current_user_async, scopes=["product"])],
     response_model=ProductsPublic,
 )
-def read_products(session: SessionDep, skip: int = 0, limit: int = 100) -> Any:
+async def read_products(
+    session: ReadSessionDep,
+    etag: Annotated[str, Depends(catalog_etag)],
+    skip: int = 0,
+    limit: int = 100,
+    cursor: str | None = None,
+    category_id: Annotated[list[uuid.UUID] | None, Query()] = None,
+    min_price: Decimal | None = None,
+    max_price: Decimal | None = None,
+    in_stock: bool | None = None,
+    currency: str | None = None,
+    include_count: bool = True,
+) -> Any:
     """
-    Retrieve products.
+    Retrieve products, optionally filtered by category, price, stock and currency.
+    """
+    category_ids = tuple(sorted(category_id)) if category_id else ()
+    key = (
+        skip,
+        limit,
+        cursor,
+        category_ids,
+        min_price,
+        max_price,
+        in_stock,
+        currency,
+        include_count,
+    )
+    cached = product_page_cache.get(key)
+    if cached is not None and cached[0] == etag:
+        return cached[1]
+
+    filters: list[Any] = []
+    if category_ids:
+        filters.append(
+            exists().where(
+                col(ProductCategoryLink.product_id) == Product.id,
+                col(ProductCategoryLink.category_id).in_(category_ids),
+            )
+        )
+    if min_price is not None:
+        filters.append(Product.price >= min_price)
+    if max_price is not None:
+        filters.append(Product.price <= max_price)
+    if in_stock is True:
+        filters.append(Product.available_quantity > 0)  # type: ignore[operator]
+    elif in_stock is False:
+        filters.append(func.coalesce(Product.available_quantity, 0) <= 0)
+    if currency:
+        filters.append(Product.currency == currency.upper())
+
+    page = await paginate_async(
+        session,
+        with_loaders(select(Product).where(*filters), ProductsPublic),
+        Product,
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
+        include_count=include_count,
+    )
+
+    products = ProductsPublic(
+        data=page.rows,
+        count=page.count,
+        next_cursor=page.next_cursor,
+    )
+    product_page_cache.set(key, (etag, products))
+    return products
+
+
+def search_statements(
+    q: str, *, limit: int, cursor: str | None = None
+) -> tuple[Any, Any]:
+    """
+    The match count and one page of (product, rank) rows for a search, best
+    matches first.
+    """
+    query = func.websearch_to_tsquery("english", q)
+    match = Product.search_vector.bool_op("@@")(query)  # type: ignore[union-attr]
+    # ts_rank_cd returns real, which never equals the double a cursor decodes
+    # to. Ranked as double precision the cursor round-trips exactly.
+    rank = cast(func.ts_rank_cd(Product.search_vector, query), Float(precision=53))
+
+    count_statement = select(func.count()).select_from(Product).where(match)
+    statement = (
+        with_loaders(select(Product, rank), ProductsPublic)
+        .where(match)
+        .order_by(rank.desc(), col(Product.id))
+        .limit(limit)
+    )
+    if cursor:
+        last_rank, last_id = decode_cursor(cursor, float)
+        statement = statement.where(
+            or_(rank < last_rank, and_(rank == last_rank, col(Product.id) > last_id))
+        )
+    return count_statement, statement
+
+
+@router.get(
+    "/search",
+    dependencies=[
+        Security(get_current_user_async, scopes=["product"]),
+        Depends(catalog_etag),
+    ],
+    response_model=ProductsPublic,
+)
+async def search_products(
+    session: ReadSessionDep,
+    q: Annotated[str, Query(min_length=1, max_length=255)],
+    limit: int = 100,
+    cursor: str | None = None,
+) -> Any:
+    """
+    Full-text search over product names and descriptions, best matches first.
     """
-    count_statement = select(func.count()).select_from(Product)
-    count = session.exec(count_statement).one()
-    statement = select(Product).offset(skip).limit(limit)
-    products = session.exec(statement).all()
+    count_statement, statement = search_statements(q, limit=limit, cursor=cursor)
+    count = (await session.exec(count_statement)).one()
+    rows = (await session.exec(statement)).all()
 
-    return ProductsPublic(data=products, count=count)  # type: ignore
+    next_cursor = None
+    if rows and len(rows) == limit:
+        last_product, last_rank = rows[-1]
+        next_cursor = encode_cursor(last_rank, last_product.id)
+    products = [product for product, _ in rows]
+    return ProductsPublic(data=products, count=count, next_cursor=next_cursor)
+
+
+@router.get(
+    "/categories",
+    dependencies=[
+        Security(get_current_user_async, scopes=["product:category"]),
+        Depends(category_etag),
+    ],
+    response_model=CategoriesPublic,
+)
+async def read_product_categories(session: ReadSessionDep):
+    count_statement = select(func.count()).select_from(Category)
+    count = (await session.exec(count_statement)).one()
+    categories = (await session.exec(select(Category))).all()
+    return CategoriesPublic(count=count, data=categories)  # type: ignore
+
+
+@router.post(
+    "/categories",
+    dependencies=[Security(get_current_user, scopes=["product:category:write"])],
+    response_model=CategoryPublic,
+)
+def create_product_category(session: SessionDep, category_in: CategoryCreate):
+    category = Category.model_validate(category_in)
+    crud.save(session=session, db_obj=category)
+    return category
+
+
+@router.put("/categories", response_model=Message)
+def update_products_categories(
+    session: SessionDep,
+    current_user: Annotated[User, Security(get_current_user, scopes=["product:write"])],
+    assignments: dict[uuid.UUID, list[uuid.UUID]],
+) -> Message:
+    """
+    Replace the categories of many products, keyed by product id.
+    """
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Not enough permissions"
+        )
+
+    if len(assignments) == 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="No product ids provided"
+        )
+
+    try:
+        crud.assign_product_categories(session=session, assignments=assignments)
+    except MissingResourcesError as ex:
+        status_code = (
+            status.HTTP_404_NOT_FOUND
+            if ex.resource == "Product"
+            else status.HTTP_400_BAD_REQUEST
+        )
+        raise HTTPException(status_code=status_code, detail=str(ex)) from ex
+    return Message(message=f"Categories updated for {len(assignments)} products")
 
 
 @router.get(
     "/{id}",
-    dependencies=[Security(get_current_user, scopes=["product"])],
+    dependencies=[Security(get_current_user_async, scopes=["product"])],
     response_model=ProductPublic,
 )
-def read_product(session: SessionDep, id: uuid.UUID) -> Any:
+async def read_product(
+    session: ReadSessionDep,
+    etag: Annotated[str, Depends(product_etag)],
+    id: uuid.UUID,
+) -> Any:
     """
     Retrieve products.
     """
-    product = session.get(Product, id)
+    cached = product_cache.get(id)
+    if cached is not None and cached[0] == etag:
+        return cached[1]
+
+    product = await session.get(Product, id, options=load_options(ProductPublic))
     if not product:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Product not found"
         )
-    return product
+    product_public = ProductPublic.model_validate(product)
+    product_cache.set(id, (etag, product_public))
+    return product_public
 
 
 @router.get(
     "/{id}/reviews",
-    dependencies=[Security(get_current_user, scopes=["product:review"])],
+    dependencies=[Security(get_current_user_async, scopes=["product:review"])],
     response_model=ReviewsPublic,
 )
-def read_product_reviews(
+async def read_product_reviews(
     *,
-    session: SessionDep,
+    session: ReadSessionDep,
     id: uuid.UUID,
+    limit: int = 100,
+    cursor: str | None = None,
+    sort: ReviewSort = ReviewSort.NEWEST,
 ) -> Any:
     """
     Read reviews for a given product.
     """
-    product = session.get(Product, id)
+    product = await session.get(
+        Product,
+        id,
+        options=[defer(Product.search_vector)],  # type: ignore[arg-type]
+    )
     if not product:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Product not found"
         )
-    return product.reviews
+
+    match sort:
+        case ReviewSort.HIGHEST:
+            key, descending = Review.rating, True
+        case ReviewSort.LOWEST:
+            key, descending = Review.rating, False
+        case _:
+            key, descending = Review.created_at, True
+    page = await paginate_async(
+        session,
+        select(Review).where(Review.product_id == id),
+        Review,
+        limit=limit,
+        cursor=cursor,
+        key=key,
+        descending=descending,
+    )
+
+    return ReviewsPublic(
+        data=page.rows,
+        count=product.rating_count,
+        next_cursor=page.next_cursor,
+    )
+
+
+def get_product_review(session: Session, id: uuid.UUID, review_id: uuid.UUID) -> Review:
+    review = session.get(Review, review_id)
+    if not review or review.product_id != id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Review not found"
+        )
+    return review
 
 
 @router.post("/{id}/reviews", response_model=ReviewPublic)
@@ -102,8 +372,9 @@ def create_product_review(
         review_in, update={"customer_id": current_user.id, "product_id": id}
     )
     session.add(review)
+    crud.update_product_rating(session=session, id=id, added=review.rating)
     session.commit()
-    session.refresh(review)
+    invalidate_product(id)
     return review
 
 
@@ -121,26 +392,21 @@ def update_product_review(
     """
     Update a review for a product.
     """
-    product = session.get(Product, id)
-    if not product:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Product not found"
-        )
-    try:
-        review = next(r for r in product.reviews if r.id == review_id)
-    except Exception as ex:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Review not found"
-        ) from ex
+    review = get_product_review(session, id, review_id)
     if not current_user.is_superuser and (review.customer_id != current_user.id):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Not enough permissions"
         )
+    old_rating = review.rating
     update_dict = review_in.model_dump(exclude_unset=True)
     review.sqlmodel_update(update_dict)
     session.add(review)
+    if review.rating != old_rating:
+        crud.update_product_rating(
+            session=session, id=id, added=review.rating, removed=old_rating
+        )
     session.commit()
-    session.refresh(review)
+    invalidate_product(id)
     return review
 
 
@@ -157,51 +423,18 @@ def delete_product_review(
     """
     Delete a review for a product.
     """
-    product = session.get(Product, id)
-    if not product:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Product not found"
-        )
-    try:
-        review = next(r for r in product.reviews if r.id == review_id)
-    except Exception as ex:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Review not found"
-        ) from ex
+    review = get_product_review(session, id, review_id)
     if not current_user.is_superuser and (review.customer_id != current_user.id):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Not enough permissions"
         )
     session.delete(review)
+    crud.update_product_rating(session=session, id=id, removed=review.rating)
     session.commit()
+    invalidate_product(id)
     return Message(message="Review deleted successfully")
 
 
-@router.get(
-    "/categories",
-    dependencies=[Security(get_current_user, scopes=["product:category"])],
-    response_model=CategoriesPublic,
-)
-def read_product_categories(session: SessionDep):
-    count_statement = select(func.count()).select_from(Category)
-    count = session.exec(count_statement).one()
-    categories = session.exec(select(Category)).all()
-    return CategoriesPublic(count=count, data=categories)  # type: ignore
-
-
-@router.post(
-    "/categories",
-    dependencies=[Security(get_current_user, scopes=["product:category:write"])],
-    response_model=CategoryPublic,
-)
-def create_product_category(session: SessionDep, category_in: CategoryCreate):
-    category = Category.model_validate(category_in)
-    session.add(category)
-    session.commit()
-    session.refresh(category)
-    return category
-
-
 @router.put("/{id}/categories", response_model=ProductPublic)
 def update_product_categories(
     session: SessionDep,
@@ -219,25 +452,19 @@ def update_product_categories(
             status_code=status.HTTP_400_BAD_REQUEST, detail="No category ids provided"
         )
 
-    product = session.get(Product, id)
+    product = session.get(Product, id, options=load_options(ProductPublic))
     if not product:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Product with id {id} not found",
         )
 
-    categories = []
-    for i in category_ids:
-        category = session.get(Category, id)
-        if not category:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Category with id {i} does not exist",
-            )
-        categories.append(category)
-
-    product.categories = categories
-    session.add(product)
-    session.commit()
-    session.refresh(product)
+    try:
+        crud.assign_product_categories(session=session, assignments={id: category_ids})
+    except MissingResourcesError as ex:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(ex)
+        ) from ex
+    # the links were rewritten with Core statements the loaded product can't see
+    session.refresh(product, ["categories"])
     return product
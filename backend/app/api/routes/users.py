@@ -1,14 +1,18 @@
 import uuid
 from typing import Annotated, Any
 
-from fastapi import APIRouter, HTTPException, Security, status
-from sqlmodel import func, select
+from fastapi import APIRouter, Depends, HTTPException, Security, status
+from sqlmodel import select
 
 from app import crud
 from app.api.deps import (
     SessionDep,
     get_current_user,
+    get_current_user_fresh,
 )
+from app.api.pagination import paginate
+from app.api.ratelimit import signup_limit
+from app.core.cache import invalidate_user
 from app.core.config import settings
 from app.core.security import get_password_hash, verify_password
 from app.models import (
@@ -36,17 +40,23 @@ def read_users(
     session: SessionDep,
     skip: int = 0,
     limit: int = 100,
+    cursor: str | None = None,
+    include_count: bool = True,
 ) -> Any:
     """
     Retrieve users.
     """
-    count_statement = select(func.count()).select_from(User)
-    count = session.exec(count_statement).one()
+    page = paginate(
+        session,
+        select(User),
+        User,
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
+        include_count=include_count,
+    )
 
-    statement = select(User).offset(skip).limit(limit)
-    users = session.exec(statement).all()
-
-    return UsersPublic(data=users, count=count)  # type: ignore
+    return UsersPublic(data=page.rows, count=page.count, next_cursor=page.next_cursor)  # type: ignore
 
 
 @router.post(
@@ -87,7 +97,9 @@ def update_user_me(
     *,
     session: SessionDep,
     user_in: UserUpdateMe,
-    current_user: Annotated[User, Security(get_current_user, scopes=["user:me:write"])],
+    current_user: Annotated[
+        User, Security(get_current_user_fresh, scopes=["user:me:write"])
+    ],
 ) -> Any:
     """
     Update own user.
@@ -102,9 +114,8 @@ def update_user_me(
             )
     user_data = user_in.model_dump(exclude_unset=True)
     current_user.sqlmodel_update(user_data)
-    session.add(current_user)
-    session.commit()
-    session.refresh(current_user)
+    crud.save(session=session, db_obj=current_user)
+    invalidate_user(current_user.id)
     return current_user
 
 
@@ -114,7 +125,7 @@ def update_password_me(
     session: SessionDep,
     body: UpdatePassword,
     current_user: Annotated[
-        User, Security(get_current_user, scopes=["user:me:password:write"])
+        User, Security(get_current_user_fresh, scopes=["user:me:password:write"])
     ],
 ) -> Any:
     """
@@ -133,6 +144,7 @@ def update_password_me(
     current_user.hashed_password = hashed_password
     session.add(current_user)
     session.commit()
+    invalidate_user(current_user.id)
     return Message(message="Password updated successfully")
 
 
@@ -149,7 +161,9 @@ def read_user_me(
 @router.delete("/me", response_model=Message)
 def delete_user_me(
     session: SessionDep,
-    current_user: Annotated[User, Security(get_current_user, scopes=["user:me:write"])],
+    current_user: Annotated[
+        User, Security(get_current_user_fresh, scopes=["user:me:write"])
+    ],
 ) -> Any:
     """
     Delete own user.
@@ -161,10 +175,11 @@ def delete_user_me(
         )
     session.delete(current_user)
     session.commit()
+    invalidate_user(current_user.id)
     return Message(message="User deleted successfully")
 
 
-@router.post("/signup", response_model=UserPublic)
+@router.post("/signup", response_model=UserPublic, dependencies=[Depends(signup_limit)])
 def register_user(session: SessionDep, user_in: UserRegister) -> Any:
     """
     Create new user without the need to be logged in.
@@ -176,8 +191,7 @@ def register_user(session: SessionDep, user_in: UserRegister) -> Any:
             detail="The user with this email already exists in the system",
         )
     user_create = UserCreate.model_validate(user_in)
-    user = crud.create_user(session=session, user_create=user_create)
-    return UserPublic(**user)
+    return crud.create_user(session=session, user_create=user_create)
 
 
 @router.get("/{user_id}", response_model=UserPublic)
@@ -202,7 +216,7 @@ def read_user_by_id(
 
 @router.patch(
     "/{user_id}",
-    dependencies=[Security(get_current_user, scopes="user:write")],
+    dependencies=[Security(get_current_user_fresh, scopes="user:write")],
     response_model=UserPublic,
 )
 def update_user(
@@ -236,7 +250,9 @@ def update_user(
 @router.delete("/{user_id}")
 def delete_user(
     session: SessionDep,
-    current_user: Annotated[User, Security(get_current_user, scopes=["user:delete"])],
+    current_user: Annotated[
+        User, Security(get_current_user_fresh, scopes=["user:delete"])
+    ],
     user_id: uuid.UUID,
 ) -> Message:
     """
@@ -254,4 +270,5 @@ def delete_user(
         )
     session.delete(user)
     session.commit()
+    invalidate_user(user.id)
     return Message(message="User deleted successfully")
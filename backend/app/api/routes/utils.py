@@ -1,15 +1,23 @@
-from concurrent.futures import ThreadPoolExecutor, wait
+import uuid
+from typing import cast
 
 import stripe
 from fastapi import APIRouter, HTTPException, Request, Security, status
 from loguru import logger
 from pydantic.networks import EmailStr
+from sqlalchemy import orm
+from sqlmodel import Session
 
-from app.api.deps import SessionDep, get_current_user
+import app.crud as crud
+from app.api.deps import AsyncSessionDep, get_current_user
+from app.core.cache import product_cache, product_page_cache
 from app.core.config import settings
-from app.event_handler import EventHandler
-from app.models import Message
+from app.core.db import async_engine, engine, replica_engines
+from app.core.pool import pool_stats
+from app.core.security import password_pool
+from app.models import CacheStats, Message, PoolStats, WorkerPoolStats
 from app.utils import generate_test_email, send_email
+from app.webhook_inbox import webhook_inbox
 
 router = APIRouter()
 
@@ -32,13 +40,59 @@ def test_email(email_to: EmailStr) -> Message:
     return Message(message="Test email sent")
 
 
+@router.get(
+    "/cache-stats",
+    dependencies=[Security(get_current_user, scopes=["utils"])],
+)
+def cache_stats() -> dict[str, CacheStats]:
+    """
+    Hit/miss counters for the process-local caches of this worker.
+    """
+    return {
+        "products": product_cache.stats(),
+        "product_pages": product_page_cache.stats(),
+    }
+
+
+@router.get(
+    "/pool-stats",
+    dependencies=[Security(get_current_user, scopes=["utils"])],
+)
+def db_pool_stats() -> dict[str, PoolStats]:
+    """
+    Connection pool usage, checkout waits and churn for this worker's engines.
+    """
+    return {
+        "sync": pool_stats(engine.pool),  # type: ignore[arg-type]
+        "async": pool_stats(async_engine.pool),  # type: ignore[arg-type]
+        **{
+            f"replica_{i}": pool_stats(replica.pool)  # type: ignore[arg-type]
+            for i, replica in enumerate(replica_engines)
+        },
+    }
+
+
+@router.get(
+    "/password-pool-stats",
+    dependencies=[Security(get_current_user, scopes=["utils"])],
+)
+def password_pool_stats() -> WorkerPoolStats:
+    """
+    Queue depth and call durations of this worker's password hashing pool.
+    """
+    return password_pool.stats()
+
+
 @router.get("/health-check")
 async def health_check() -> bool:
     return True
 
 
-async def webhook(request: Request, session: SessionDep):
-    event = None
+async def webhook(request: Request, session: AsyncSessionDep) -> dict[str, bool]:
+    """
+    Verify a Stripe event and store it in the inbox, app.webhook_inbox
+    processes it after the acknowledgement.
+    """
     data = await request.json()
     logger.debug(f"got event {type(data)}")
 
@@ -58,14 +112,16 @@ async def webhook(request: Request, session: SessionDep):
             logger.exception("failed to verify stripe webhook signature")
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST) from ex
 
-    executor = ThreadPoolExecutor(max_workers=1)
-    future = executor.submit(EventHandler.process, session=session, event=event)
+    if not event.get("id") or not event.get("type"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST)
 
-    _, running_or_err = wait([future], timeout=1.5, return_when="FIRST_EXCEPTION")
-    for f in running_or_err:
-        try:
-            f.result()
-        except Exception as ex:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST) from ex
+    def enqueue(sync_session: orm.Session) -> uuid.UUID | None:
+        # the sync side of a sqlmodel AsyncSession is a sqlmodel Session
+        return crud.enqueue_webhook_event(
+            session=cast(Session, sync_session), event=data
+        )
 
+    id = await session.run_sync(enqueue)
+    if id is not None:
+        webhook_inbox.notify()
     return {"success": True}
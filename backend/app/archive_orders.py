@@ -0,0 +1,164 @@
+import argparse
+import gzip
+import logging
+import shutil
+import tempfile
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any, Protocol
+
+from sqlalchemy import Connection, Engine
+
+from app.core.config import AWSSource, settings
+from app.core.db import engine
+from app.core.partitions import (
+    PARTITIONED_TABLES,
+    Partition,
+    add_months,
+    default_partition_rows,
+    detach_partition,
+    ensure_partitions,
+    list_partitions,
+    month_of,
+    quote,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class ArchiveStore(Protocol):
+    def put(self, key: str, path: Path) -> str: ...
+
+
+class S3ArchiveStore:
+    def __init__(self, client: Any, bucket: str, prefix: str = "") -> None:
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+
+    def put(self, key: str, path: Path) -> str:
+        key = f"{self.prefix}/{key}" if self.prefix else key
+        self.client.upload_file(str(path), self.bucket, key)
+        return f"s3://{self.bucket}/{key}"
+
+
+class LocalArchiveStore:
+    """
+    Stand-in for S3 when no bucket is configured, e.g. in local development.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+
+    def put(self, key: str, path: Path) -> str:
+        destination = self.directory / key
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(path, destination)
+        return str(destination)
+
+
+def get_store() -> ArchiveStore:
+    if settings.ARCHIVE_BUCKET:
+        return S3ArchiveStore(
+            AWSSource.s3, settings.ARCHIVE_BUCKET, settings.ARCHIVE_PREFIX
+        )
+    return LocalArchiveStore(Path(settings.ARCHIVE_DIR))
+
+
+def archive_key(partition: Partition) -> str:
+    return f"{partition.table}/{partition.name}.csv.gz"
+
+
+def export_partition(conn: Connection, partition: Partition, path: Path) -> None:
+    """
+    Write a partition to `path` as gzipped CSV with a header row.
+    """
+    statement = f"COPY {quote(conn, partition.name)} TO STDOUT (FORMAT csv, HEADER)"
+    cursor = conn.connection.driver_connection.cursor()  # type: ignore[union-attr]
+    with cursor, cursor.copy(statement) as copy, gzip.open(path, "wb") as file:
+        for data in copy:
+            file.write(data)
+
+
+def archive_partition(engine: Engine, store: ArchiveStore, partition: Partition) -> str:
+    """
+    Detach a partition, upload it to `store` and drop it.
+
+    Each step commits on its own. A run that fails after the detach leaves
+    the table behind detached, and the next run picks it up from there.
+    """
+    with engine.connect() as conn:
+        if partition.attached:
+            detach_partition(conn, partition)
+            conn.commit()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / f"{partition.name}.csv.gz"
+            export_partition(conn, partition, path)
+            location = store.put(archive_key(partition), path)
+
+        conn.exec_driver_sql(f"DROP TABLE {quote(conn, partition.name)}")
+        conn.commit()
+    return location
+
+
+def expired_partitions(
+    conn: Connection, *, retention_months: int, now: float | None = None
+) -> list[Partition]:
+    """
+    Partitions, attached or not, of months entirely older than
+    `retention_months` before the current one. Order item partitions come
+    first, an order partition can't be detached while items reference it.
+    """
+    current = month_of(datetime.now(UTC).timestamp() if now is None else now)
+    cutoff = add_months(current, -retention_months)
+    return [
+        partition
+        for table in reversed(PARTITIONED_TABLES)
+        for partition in list_partitions(conn, table)
+        if partition.month < cutoff
+    ]
+
+
+def init(*, retention_months: int, dry_run: bool = False) -> list[str]:
+    with engine.connect() as conn:
+        created = ensure_partitions(conn, ahead=settings.ORDER_PARTITIONS_AHEAD)
+        conn.commit()
+        logger.info("Order partitions in place: %s", ", ".join(created))
+        for table in PARTITIONED_TABLES:
+            if rows := default_partition_rows(conn, table):
+                logger.warning("%d rows in the default partition of %s", rows, table)
+        expired = expired_partitions(conn, retention_months=retention_months)
+
+    if dry_run:
+        for partition in expired:
+            logger.info("Would archive %s", partition.name)
+        return []
+
+    store = get_store()
+    archived = []
+    for partition in expired:
+        location = archive_partition(engine, store, partition)
+        logger.info("Archived %s to %s", partition.name, location)
+        archived.append(location)
+    return archived
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Create upcoming order partitions and archive expired ones"
+    )
+    parser.add_argument(
+        "--retention-months", type=int, default=settings.ORDER_RETENTION_MONTHS
+    )
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    logger.info("Archiving orders older than %d months", args.retention_months)
+    archived = init(retention_months=args.retention_months, dry_run=args.dry_run)
+    logger.info("Archived %d partitions", len(archived))
+
+
+if __name__ == "__main__":
+    main()
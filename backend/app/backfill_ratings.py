@@ -0,0 +1,24 @@
+import logging
+
+from sqlmodel import Session
+
+from app import crud
+from app.core.db import engine
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def init() -> int:
+    with Session(engine) as session:
+        return crud.recompute_product_ratings(session=session)
+
+
+def main() -> None:
+    logger.info("Backfilling product review aggregates")
+    count = init()
+    logger.info("Backfilled review aggregates for %d products", count)
+
+
+if __name__ == "__main__":
+    main()
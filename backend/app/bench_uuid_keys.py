@@ -0,0 +1,193 @@
+import argparse
+import logging
+import random
+import time
+import uuid
+from collections.abc import Callable
+from dataclasses import dataclass
+from decimal import Decimal
+
+from psycopg import sql
+from sqlalchemy import Engine
+
+from app.core.db import engine
+from app.core.ids import uuid7
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ITEMS_PER_ORDER = 3
+PRODUCTS = 1_000
+COLUMNS = (
+    "id",
+    "created_at",
+    "updated_at",
+    "quantity",
+    "final_price",
+    "order_id",
+    "product_id",
+)
+
+# A plain table shaped like an unpartitioned orderitem, with its foreign key
+# indexes, so the primary key is the id alone and the loads aren't routed
+# through partitions
+CREATE_TABLE = """
+CREATE TABLE {table} (
+    id uuid PRIMARY KEY,
+    created_at integer NOT NULL,
+    updated_at integer NOT NULL,
+    quantity integer NOT NULL,
+    final_price numeric(10, 2) NOT NULL,
+    order_id uuid NOT NULL,
+    product_id uuid
+)
+"""
+
+ID_FACTORIES: dict[str, Callable[[], uuid.UUID]] = {
+    "uuid4": uuid.uuid4,
+    "uuid7": uuid7,
+}
+
+
+@dataclass
+class BenchResult:
+    variant: str
+    rows: int
+    seconds: float
+    table_bytes: int
+    pkey_bytes: int
+    indexes_bytes: int
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def bench_variant(
+    engine: Engine,
+    variant: str,
+    *,
+    rows: int,
+    batch_size: int,
+    products: list[uuid.UUID],
+    keep: bool = False,
+) -> BenchResult:
+    """
+    Load `rows` order items into a scratch orderitem table, with
+    ids from the `variant` factory, and measure the load and index sizes.
+
+    Orders get ids from the same factory as their items, as they would in
+    production. Rows are generated before each COPY so only the database
+    side is timed, and every batch commits like a stream of checkouts would.
+    """
+    new_id = ID_FACTORIES[variant]
+    table = sql.Identifier(f"bench_orderitem_{variant}")
+    copy_statement = sql.SQL("COPY {table} ({columns}) FROM STDIN").format(
+        table=table, columns=sql.SQL(", ").join(map(sql.Identifier, COLUMNS))
+    )
+    raw = engine.raw_connection()
+    try:
+        conn = raw.driver_connection
+        assert conn is not None
+        with conn.cursor() as cursor:
+            cursor.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(table))
+            cursor.execute(sql.SQL(CREATE_TABLE).format(table=table))
+            for column in ("order_id", "product_id"):
+                cursor.execute(
+                    sql.SQL("CREATE INDEX ON {table} ({column})").format(
+                        table=table, column=sql.Identifier(column)
+                    )
+                )
+        conn.commit()
+
+        seconds = 0.0
+        written = 0
+        order_id = new_id()
+        while written < rows:
+            batch = []
+            for i in range(written, min(written + batch_size, rows)):
+                if i % ITEMS_PER_ORDER == 0:
+                    order_id = new_id()
+                now = int(time.time())
+                batch.append(
+                    (
+                        new_id(),
+                        now,
+                        now,
+                        1,
+                        Decimal("9.99"),
+                        order_id,
+                        random.choice(products),
+                    )
+                )
+
+            started = time.perf_counter()
+            with conn.cursor() as cursor, cursor.copy(copy_statement) as copy:
+                for row in batch:
+                    copy.write_row(row)
+            conn.commit()
+            seconds += time.perf_counter() - started
+            written += len(batch)
+            logger.debug("%s: %d rows loaded", variant, written)
+
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_relation_size(%(t)s::regclass),"
+                " (SELECT pg_relation_size(indexrelid) FROM pg_index"
+                "  WHERE indrelid = %(t)s::regclass AND indisprimary),"
+                " pg_indexes_size(%(t)s::regclass)",
+                {"t": f"bench_orderitem_{variant}"},
+            )
+            table_bytes, pkey_bytes, indexes_bytes = cursor.fetchone() or (0, 0, 0)
+            if not keep:
+                cursor.execute(sql.SQL("DROP TABLE {}").format(table))
+        conn.commit()
+    finally:
+        raw.close()
+    return BenchResult(variant, rows, seconds, table_bytes, pkey_bytes, indexes_bytes)
+
+
+def init(rows: int, batch_size: int, keep: bool = False) -> list[BenchResult]:
+    products = [uuid.uuid4() for _ in range(PRODUCTS)]
+    return [
+        bench_variant(
+            engine,
+            variant,
+            rows=rows,
+            batch_size=batch_size,
+            products=products,
+            keep=keep,
+        )
+        for variant in ID_FACTORIES
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare uuid4 and uuid7 primary keys on order items"
+    )
+    # At this default on a local PostgreSQL 16 (1 vCPU, shared_buffers 128MB):
+    # uuid4 35801 rows/s with a 385 MB pkey, uuid7 65442 rows/s and 300 MB
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--batch-size", type=int, default=100_000)
+    parser.add_argument(
+        "--keep", action="store_true", help="keep the scratch tables around"
+    )
+    args = parser.parse_args()
+
+    logger.info("Loading %d order items per key type", args.rows)
+    results = init(args.rows, args.batch_size, keep=args.keep)
+    for result in results:
+        logger.info(
+            "%s: %.0f rows/s (%.1fs), table %d MB, pkey %d MB, all indexes %d MB",
+            result.variant,
+            result.rows_per_second,
+            result.seconds,
+            result.table_bytes // 2**20,
+            result.pkey_bytes // 2**20,
+            result.indexes_bytes // 2**20,
+        )
+
+
+if __name__ == "__main__":
+    main()
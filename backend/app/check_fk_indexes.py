@@ -0,0 +1,79 @@
+import logging
+import sys
+from collections.abc import Iterable
+
+from sqlalchemy import Engine, MetaData, inspect
+
+from app.core.db import engine
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# table -> (foreign key column lists, index column lists)
+TableKeys = dict[str, tuple[list[list[str]], list[list[str]]]]
+
+
+def is_covered(foreign_key: list[str], indexes: Iterable[list[str]]) -> bool:
+    """
+    A foreign key is covered when an index leads with all of its columns, in
+    any order, so lookups and cascades on it don't scan the table.
+    """
+    return any(set(index[: len(foreign_key)]) == set(foreign_key) for index in indexes)
+
+
+def find_gaps(tables: TableKeys) -> list[tuple[str, list[str]]]:
+    return [
+        (table, foreign_key)
+        for table, (foreign_keys, indexes) in sorted(tables.items())
+        for foreign_key in foreign_keys
+        if not is_covered(foreign_key, indexes)
+    ]
+
+
+def keys_from_metadata(metadata: MetaData) -> TableKeys:
+    tables: TableKeys = {}
+    for table in metadata.sorted_tables:
+        foreign_keys = [
+            [column.name for column in constraint.columns]
+            for constraint in table.foreign_key_constraints
+        ]
+        indexes = [[column.name for column in table.primary_key.columns]]
+        indexes += [
+            [column.name for column in index.columns] for index in table.indexes
+        ]
+        tables[table.name] = (foreign_keys, indexes)
+    return tables
+
+
+def keys_from_database(engine: Engine) -> TableKeys:
+    inspector = inspect(engine)
+    tables: TableKeys = {}
+    for table in inspector.get_table_names():
+        foreign_keys = [
+            fk["constrained_columns"] for fk in inspector.get_foreign_keys(table)
+        ]
+        indexes = [inspector.get_pk_constraint(table)["constrained_columns"]]
+        indexes += [
+            [column for column in index["column_names"] if column]
+            for index in inspector.get_indexes(table)
+        ]
+        tables[table] = (foreign_keys, indexes)
+    return tables
+
+
+def init() -> list[tuple[str, list[str]]]:
+    return find_gaps(keys_from_database(engine))
+
+
+def main() -> None:
+    logger.info("Checking foreign keys for covering indexes")
+    gaps = init()
+    for table, columns in gaps:
+        logger.warning("%s(%s) has no index leading with it", table, ", ".join(columns))
+    if gaps:
+        sys.exit(1)
+    logger.info("All foreign keys are indexed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Generic, TypeVar
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.core.channels import RESET, InvalidationChannel, LocalChannel, PostgresChannel
+from app.core.config import settings
+from app.models import CacheStats, ProductPublic, ProductsPublic, TokenPayload, User
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """
+    Thread-safe, size-bounded LRU cache with an optional per-entry TTL.
+
+    The cache is process-local, so the TTL bounds how stale an entry can get
+    in workers that never see the invalidation for it.
+    """
+
+    def __init__(self, maxsize: int, ttl: float | None = None) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: OrderedDict[K, tuple[float | None, V]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: K) -> V | None:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: K, value: V, ttl: float | None = None) -> None:
+        """
+        Store `value`, expiring after `ttl` seconds when given instead of the
+        cache-wide TTL.
+        """
+        if self.maxsize <= 0:
+            return
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: K) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                size=len(self._data),
+                maxsize=self.maxsize,
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+            )
+
+
+# Serialized catalog reads, keyed by product id and by page parameters. Each
+# body is stored with the catalog ETag it was built at and only served under
+# that tag, so writes seen by other workers never serve a stale body.
+product_cache: LRUCache[uuid.UUID, tuple[str, ProductPublic]] = LRUCache(
+    settings.PRODUCT_CACHE_SIZE, ttl=settings.PRODUCT_CACHE_TTL
+)
+product_page_cache: LRUCache[tuple[Hashable, ...], tuple[str, ProductsPublic]] = (
+    LRUCache(settings.PRODUCT_PAGE_CACHE_SIZE, ttl=settings.PRODUCT_CACHE_TTL)
+)
+
+
+def invalidate_product(id: uuid.UUID | None = None) -> None:
+    """
+    Drop a product from the catalog cache along with every cached page.
+    """
+    if id is not None:
+        product_cache.pop(id)
+    else:
+        product_cache.clear()
+    product_page_cache.clear()
+
+
+# Active users resolved from access tokens, keyed by id. Entries are detached
+# snapshots that sessions merge back in without a query, see cache_user.
+user_cache: LRUCache[str, User] = LRUCache(
+    settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL
+)
+
+
+# Verified access token payloads keyed by the token's SHA-256, each kept until
+# the token expires
+token_cache: LRUCache[str, TokenPayload] = LRUCache(settings.TOKEN_CACHE_SIZE)
+
+
+def cache_user(user: User) -> None:
+    if not user.is_active:
+        user_cache.pop(str(user.id))
+        return
+    columns = inspect(User).column_attrs
+    snapshot = User(**{column.key: getattr(user, column.key) for column in columns})
+    make_transient_to_detached(snapshot)
+    user_cache.set(str(user.id), snapshot)
+
+
+def handle_invalidation(message: str) -> None:
+    if message == RESET:
+        user_cache.clear()
+    elif message.startswith("user:"):
+        user_cache.pop(message.removeprefix("user:"))
+
+
+def get_invalidation_channel() -> InvalidationChannel:
+    if settings.CACHE_INVALIDATION_CHANNEL == "postgres":
+        # psycopg takes the plain libpq URL, without the SQLAlchemy driver
+        dsn = str(settings.SQLALCHEMY_DATABASE_URI).replace("+psycopg", "", 1)
+        return PostgresChannel(dsn)
+    return LocalChannel()
+
+
+invalidation_channel = get_invalidation_channel()
+invalidation_channel.subscribe(handle_invalidation)
+
+
+def invalidate_user(id: uuid.UUID) -> None:
+    """
+    Drop a user from the principal cache of every worker.
+    """
+    invalidation_channel.publish(f"user:{id}")
@@ -0,0 +1,123 @@
+import threading
+from collections.abc import Callable
+from typing import Protocol
+
+import psycopg
+from loguru import logger
+from psycopg import sql
+
+Handler = Callable[[str], None]
+
+# Sent to local handlers when messages may have been missed
+RESET = "*"
+
+
+class InvalidationChannel(Protocol):
+    """
+    Carries cache invalidation messages to the handlers of every worker that
+    holds a copy of the cache, including the publishing one.
+    """
+
+    def subscribe(self, handler: Handler) -> None: ...
+
+    def publish(self, message: str) -> None: ...
+
+    def start(self) -> None: ...
+
+    def close(self) -> None: ...
+
+
+class LocalChannel:
+    """
+    Delivers messages within this process only, other workers fall back on the
+    cache TTL.
+    """
+
+    def __init__(self) -> None:
+        self.handlers: list[Handler] = []
+
+    def subscribe(self, handler: Handler) -> None:
+        self.handlers.append(handler)
+
+    def dispatch(self, message: str) -> None:
+        for handler in self.handlers:
+            handler(message)
+
+    def publish(self, message: str) -> None:
+        self.dispatch(message)
+
+    def start(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class PostgresChannel(LocalChannel):
+    """
+    Broadcasts messages to every worker with LISTEN/NOTIFY.
+
+    Messages are handled locally as soon as they are published, the NOTIFY is
+    for the other workers and handling it again here is harmless. Each worker
+    listens on its own connection in a daemon thread, and handles a RESET
+    whenever it (re)connects since messages sent while it was away are lost.
+    """
+
+    def __init__(
+        self, dsn: str, channel: str = "cache_invalidation", retry_delay: float = 1
+    ) -> None:
+        super().__init__()
+        self.dsn = dsn
+        self.channel = channel
+        self.retry_delay = retry_delay
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._connection: psycopg.Connection | None = None
+        self._lock = threading.Lock()
+
+    def publish(self, message: str) -> None:
+        self.dispatch(message)
+        with self._lock:
+            try:
+                if self._connection is None or self._connection.closed:
+                    self._connection = psycopg.connect(self.dsn, autocommit=True)
+                self._connection.execute(
+                    "SELECT pg_notify(%s, %s)", (self.channel, message)
+                )
+            except psycopg.Error:
+                logger.exception("unable to publish cache invalidation")
+                self._connection = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._listen, name="cache-invalidation", daemon=True
+        )
+        self._thread.start()
+
+    def close(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.retry_delay * 2)
+            self._thread = None
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def _listen(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                with psycopg.connect(self.dsn, autocommit=True) as conn:
+                    conn.execute(
+                        sql.SQL("LISTEN {}").format(sql.Identifier(self.channel))
+                    )
+                    self.dispatch(RESET)
+                    while not self._stopped.is_set():
+                        for notify in conn.notifies(timeout=self.retry_delay):
+                            self.dispatch(notify.payload)
+            except psycopg.Error:
+                logger.exception("cache invalidation listener disconnected")
+                self._stopped.wait(self.retry_delay)
@@ -22,7 +22,7 @@ from pydantic_settings import (
 )
 
 
-def parse_cors(v: Any) -> list[str] | str:
+def parse_list(v: Any) -> list[str] | str:
     if isinstance(v, str) and not v.startswith("["):
         return [i.strip() for i in v.split(",")]
     if isinstance(v, list | str):
@@ -88,7 +88,7 @@ class Settings(BaseSettings):
     AUTH_SCOPES: dict[str, str]
 
     BACKEND_CORS_ORIGINS: Annotated[
-        list[AnyUrl] | str, BeforeValidator(parse_cors)
+        list[AnyUrl] | str, BeforeValidator(parse_list)
     ] = []
 
     @computed_field  # type: ignore[prop-decorator]
@@ -118,6 +118,85 @@ class Settings(BaseSettings):
             path=self.POSTGRES_DB,
         )
 
+    # Optional read replicas for safe GET routes, comma separated DSNs. A
+    # replica is skipped while unreachable or lagging more than REPLICA_MAX_LAG
+    # seconds, and a client's reads stay on the primary for PRIMARY_STICKINESS
+    # seconds after it writes, whichever worker serves them.
+    POSTGRES_REPLICA_URIS: Annotated[
+        list[PostgresDsn] | str, BeforeValidator(parse_list)
+    ] = []
+    REPLICA_MAX_LAG: float = 5
+    REPLICA_CHECK_INTERVAL: float = 5
+    PRIMARY_STICKINESS: float = 5
+
+    # Per engine and per worker, so each process may hold up to
+    # 2 * (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections. Recycle is in seconds,
+    # -1 keeps connections open indefinitely.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+
+    # Requests over either threshold get their statements logged
+    SLOW_REQUEST_QUERIES: int = 50
+    SLOW_REQUEST_DB_MS: float = 500
+
+    # Opt-in JSON lines log of statements slower than SLOW_QUERY_MS, a sampled
+    # share of SELECTs is re-run under EXPLAIN (ANALYZE, BUFFERS)
+    SLOW_QUERY_LOG_FILE: str | None = None
+    SLOW_QUERY_MS: float = 200
+    SLOW_QUERY_EXPLAIN_RATE: float = 0.1
+
+    # Orders and order items are partitioned by month. Partitions are kept
+    # ORDER_PARTITIONS_AHEAD months ahead, and those older than
+    # ORDER_RETENTION_MONTHS are archived as gzipped CSV to ARCHIVE_BUCKET on
+    # S3, or to ARCHIVE_DIR when no bucket is set, then dropped.
+    ORDER_PARTITIONS_AHEAD: int = 3
+    ORDER_RETENTION_MONTHS: int = 24
+    ARCHIVE_BUCKET: str | None = None
+    ARCHIVE_PREFIX: str = "archive"
+    ARCHIVE_DIR: str = "archive"
+
+    # Users resolved from access tokens. Updates and deletes invalidate them
+    # in every worker with the "postgres" channel (LISTEN/NOTIFY), "local"
+    # only reaches the worker that made them and is for single worker runs.
+    # The TTL bounds staleness otherwise.
+    USER_CACHE_SIZE: int = 10_000
+    USER_CACHE_TTL: int = 60
+    TOKEN_CACHE_SIZE: int = 10_000
+    CACHE_INVALIDATION_CHANNEL: Literal["local", "postgres"] = "postgres"
+
+    # Processes per worker that hash and verify passwords, 0 runs bcrypt in
+    # the request thread. Changing the cost rehashes passwords on next login.
+    PASSWORD_HASH_WORKERS: int = 2
+    BCRYPT_ROUNDS: int = 12
+
+    # Token buckets for the anonymous auth routes that run bcrypt or send
+    # email, limited per client IP and per account email. Rates read
+    # "<count>/<second|minute|hour|day>". "memory" buckets are per worker,
+    # "postgres" ones are shared by every worker and node.
+    RATE_LIMIT_ENABLED: bool = True
+    # Proxies trusted to report the client address in X-Forwarded-For, comma
+    # separated addresses or networks, "*" for any. Traefik's, or "*" when the
+    # backend is only reachable through it. uvicorn reads the same variable.
+    FORWARDED_ALLOW_IPS: Annotated[list[str] | str, BeforeValidator(parse_list)] = [
+        "127.0.0.1"
+    ]
+    RATE_LIMIT_BACKEND: Literal["memory", "postgres"] = "memory"
+    LOGIN_RATE_LIMIT_IP: str = "30/minute"
+    LOGIN_RATE_LIMIT_EMAIL: str = "10/minute"
+    SIGNUP_RATE_LIMIT_IP: str = "10/hour"
+    SIGNUP_RATE_LIMIT_EMAIL: str = "5/hour"
+    PASSWORD_RECOVERY_RATE_LIMIT_IP: str = "10/hour"
+    PASSWORD_RECOVERY_RATE_LIMIT_EMAIL: str = "3/hour"
+
+    # Process-local catalog cache. Entries are checked against the catalog ETag,
+    # the TTL in seconds only bounds how long unused ones are kept.
+    PRODUCT_CACHE_SIZE: int = 1024
+    PRODUCT_PAGE_CACHE_SIZE: int = 128
+    PRODUCT_CACHE_TTL: int = 300
+
     SMTP_TLS: bool = True
     SMTP_SSL: bool = False
     SMTP_PORT: int = 587
@@ -127,6 +206,16 @@ class Settings(BaseSettings):
 
     STRIPE_API_KEY: str
     STRIPE_WEBHOOK_SECRET: str | None = None
+    # Webhook events are stored in an inbox and processed by this many threads
+    # per worker, 0 leaves them to the other workers. Failures are retried
+    # with exponential backoff, the last attempt marks the event dead.
+    WEBHOOK_WORKERS: int = 2
+    WEBHOOK_MAX_ATTEMPTS: int = 8
+    WEBHOOK_RETRY_DELAY: int = 10
+    WEBHOOK_MAX_RETRY_DELAY: int = 3600
+    # seconds a claimed event is held before another worker may retry it
+    WEBHOOK_LEASE: int = 300
+    WEBHOOK_POLL_INTERVAL: float = 1
 
     PROJECT_CONTACT_NAME: str
     PROJECT_CONTACT_EMAIL: str
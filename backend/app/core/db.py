@@ -1,12 +1,18 @@
 import random
+import uuid
 
 import stripe
 from faker import Faker
 from loguru import logger
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel import Session, create_engine, func, select
 
 from app import crud
 from app.core.config import settings
+from app.core.partitions import ensure_partitions
+from app.core.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool
+from app.core.replicas import ReplicaRouter
+from app.core.timing import track_queries
 from app.models import (
     Category,
     CategoryCreate,
@@ -18,7 +24,37 @@ from app.models import (
 )
 from app.utils import parse_stripe_price
 
-engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+pool_options = {
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_timeout": settings.DB_POOL_TIMEOUT,
+    "pool_recycle": settings.DB_POOL_RECYCLE,
+    "pool_pre_ping": settings.DB_POOL_PRE_PING,
+}
+engine = create_engine(
+    str(settings.SQLALCHEMY_DATABASE_URI),
+    poolclass=InstrumentedQueuePool,
+    **pool_options,
+)
+# psycopg serves both engines, create_async_engine picks its async driver
+async_engine = create_async_engine(
+    str(settings.SQLALCHEMY_DATABASE_URI),
+    poolclass=InstrumentedAsyncQueuePool,
+    **pool_options,
+)
+replica_engines = [
+    create_async_engine(str(uri), poolclass=InstrumentedAsyncQueuePool, **pool_options)
+    for uri in settings.POSTGRES_REPLICA_URIS
+]
+for tracked in (engine, *(e.sync_engine for e in (async_engine, *replica_engines))):
+    track_queries(tracked)
+
+replica_router = ReplicaRouter(
+    async_engine,
+    replica_engines,
+    max_lag=settings.REPLICA_MAX_LAG,
+    check_interval=settings.REPLICA_CHECK_INTERVAL,
+)
 
 
 # make sure all SQLModel models are imported (app.models) before initializing DB
@@ -31,7 +67,7 @@ fake = Faker()
 stripe.api_key = settings.STRIPE_API_KEY
 
 
-def create_products(session: Session):
+def create_products(session: Session) -> list[uuid.UUID]:
     count_statement = select(func.count()).select_from(Product)
     count = session.exec(count_statement).one()
     if count > 0:
@@ -40,7 +76,7 @@ def create_products(session: Session):
     products = stripe.Product.list()
     prices = stripe.Price.list()
 
-    created = []
+    products_in = []
     for p in products:
         try:
             price = next(i for i in prices if i.product == p.id)
@@ -50,22 +86,24 @@ def create_products(session: Session):
         if not price.unit_amount_decimal:
             continue
 
-        prod_in = ProductCreate(
-            stripe_id=p.id,
-            name=p.name,
-            description=p.description,
-            price=parse_stripe_price(price.unit_amount_decimal),
-            available_quantity=random.randint(0, 100),
-            images=p.images if len(p.images) > 0 else None,  # type: ignore
+        products_in.append(
+            ProductCreate(
+                stripe_id=p.id,
+                name=p.name,
+                description=p.description,
+                price=parse_stripe_price(price.unit_amount_decimal),
+                available_quantity=random.randint(0, 100),
+                images=p.images if len(p.images) > 0 else None,  # type: ignore
+            )
         )
 
-        new_prod = crud.create_product(session=session, product_in=prod_in)
-        crud.update_product_categories(
-            session=session,
-            id=new_prod.id,
+    ids = crud.bulk_upsert_products(session=session, products_in=products_in)
+    beans = session.exec(select(Category).where(Category.name == "beans")).first()
+    if beans and ids:
+        crud.assign_product_categories(
+            session=session, assignments={id: [beans.id] for id in ids}
         )
-        created.append(new_prod)
-    return created
+    return ids
 
 
 def get_unique_colors(x):
@@ -82,6 +120,11 @@ def init_db(session: Session) -> None:
     # This works because the models are already imported and registered from app.models
     # SQLModel.metadata.create_all(engine)
 
+    # Months ahead for the partitioned order tables, app/archive_orders.py
+    # does the same on its schedule
+    ensure_partitions(session.connection(), ahead=settings.ORDER_PARTITIONS_AHEAD)
+    session.commit()
+
     user = session.exec(
         select(User).where(User.email == settings.FIRST_SUPERUSER)
     ).first()
@@ -98,17 +141,23 @@ def init_db(session: Session) -> None:
     if len(categories) == 0:
         cats = ["beans", "accessories"]
         colors = get_unique_colors(len(cats))
-        for i, c in enumerate(cats):
-            c_in = CategoryCreate(name=c, color=colors[i])
-            crud.create_category(session=session, category_in=c_in)
+        crud.bulk_upsert_categories(
+            session=session,
+            categories_in=[
+                CategoryCreate(name=c, color=color)
+                for c, color in zip(cats, colors, strict=True)
+            ],
+        )
 
     products = create_products(session)
     logger.debug("seeded db with {num_prod} products", num_prod=len(products))
 
-    for p in products:
+    reviews_in = {}
+    for id in products:
         rating = round(random.uniform(0.5, 5) * 2) / 2
         content = fake.paragraph() if random.randint(1, 2) == 1 else None
-        review_in = ReviewCreate(rating=rating, content=content)
-        crud.create_product_review(
-            session=session, review_in=review_in, product=p.id, customer=user.id
+        reviews_in[id] = [ReviewCreate(rating=rating, content=content)]
+    if reviews_in:
+        crud.bulk_create_reviews(
+            session=session, reviews_in=reviews_in, customer=user.id
         )
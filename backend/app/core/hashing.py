@@ -0,0 +1,45 @@
+from functools import cache
+from typing import Protocol, cast
+
+from passlib.context import CryptContext
+
+# Runs inside the password pool's worker processes, keep imports light so
+# spawning a worker stays cheap
+
+
+class PasswordContext(Protocol):
+    """
+    The part of CryptContext used here, so the hashing functions stay typed
+    without the passlib stubs too.
+    """
+
+    def hash(self, secret: str) -> str: ...
+
+    def verify(self, secret: str, hash: str) -> bool: ...
+
+    def verify_and_update(self, secret: str, hash: str) -> tuple[bool, str | None]: ...
+
+
+@cache
+def get_context(rounds: int) -> PasswordContext:
+    # hashes made with any other cost are flagged for an update
+    context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+    return cast(PasswordContext, context)
+
+
+def hash_password(password: str, rounds: int) -> str:
+    return get_context(rounds).hash(password)
+
+
+def verify_password(password: str, hashed_password: str, rounds: int) -> bool:
+    return get_context(rounds).verify(password, hashed_password)
+
+
+def verify_and_update(
+    password: str, hashed_password: str, rounds: int
+) -> tuple[bool, str | None]:
+    """
+    Verify `password` and, when its hash uses outdated cost parameters,
+    return a new hash to store in its place.
+    """
+    return get_context(rounds).verify_and_update(password, hashed_password)
@@ -0,0 +1,164 @@
+import re
+from dataclasses import dataclass
+from datetime import UTC, date, datetime
+
+from sqlalchemy import Connection, text
+
+# Range partitioned by month on the given column, orders on created_at and
+# their items on order_created_at, see the partition migrations. Items
+# reference orders, so orders come first.
+PARTITIONED_TABLES = {"order": "created_at", "orderitem": "order_created_at"}
+PARTITION_NAME = re.compile(r"^(?P<table>\w+)_(?P<year>\d{4})_(?P<month>\d{2})$")
+
+PARTITIONS_QUERY = text(
+    "SELECT c.relname, i.inhparent IS NOT NULL AS attached "
+    "FROM pg_class c "
+    "JOIN pg_namespace n ON n.oid = c.relnamespace AND n.nspname = current_schema() "
+    "LEFT JOIN pg_inherits i "
+    "ON i.inhrelid = c.oid AND i.inhparent = CAST(:parent AS regclass) "
+    "WHERE c.relkind = 'r' AND starts_with(c.relname, :prefix)"
+)
+
+
+@dataclass(frozen=True)
+class Partition:
+    table: str
+    name: str
+    month: date
+    # detached partitions are left behind by an archive run that failed
+    # before dropping them
+    attached: bool = True
+
+
+def month_of(timestamp: float) -> date:
+    return datetime.fromtimestamp(timestamp, UTC).date().replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    year, index = divmod(month.year * 12 + month.month - 1 + months, 12)
+    return date(year, index + 1, 1)
+
+
+def month_bounds(month: date) -> tuple[int, int]:
+    """
+    The [start, end) created_at range of a month, in epoch seconds.
+    """
+    start = datetime(month.year, month.month, 1, tzinfo=UTC)
+    end = datetime.combine(add_months(month, 1), start.timetz())
+    return int(start.timestamp()), int(end.timestamp())
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_{month:%Y_%m}"
+
+
+def parse_partition(table: str, name: str, attached: bool = True) -> Partition | None:
+    match = PARTITION_NAME.match(name)
+    if not match or match["table"] != table:
+        return None
+    return Partition(
+        table, name, date(int(match["year"]), int(match["month"]), 1), attached
+    )
+
+
+def quote(conn: Connection, name: str) -> str:
+    return conn.dialect.identifier_preparer.quote_identifier(name)
+
+
+def partition_exists(conn: Connection, name: str) -> bool:
+    statement = text("SELECT to_regclass(:name) IS NOT NULL")
+    return bool(conn.execute(statement, {"name": quote(conn, name)}).scalar_one())
+
+
+def in_month(conn: Connection, table: str, month: date) -> str:
+    start, end = month_bounds(month)
+    key = quote(conn, PARTITIONED_TABLES[table])
+    return f"{key} >= {start} AND {key} < {end}"
+
+
+def default_rows_in(conn: Connection, table: str, month: date) -> bool:
+    statement = (
+        f"SELECT EXISTS (SELECT FROM {quote(conn, f'{table}_default')} "
+        f"WHERE {in_month(conn, table, month)})"
+    )
+    return bool(conn.exec_driver_sql(statement).scalar_one())
+
+
+def create_partitions(conn: Connection, month: date) -> list[str]:
+    """
+    Create the partitions of `month` for every partitioned table, skipping
+    those that already exist.
+
+    Rows the default partitions hold for the month are moved into the new
+    partitions: each is built as a plain table, filled, and attached once
+    the rows are gone from the default partition. The tables are locked for
+    the move, which only happens when writes ran past the last partition.
+    """
+    names = {table: partition_name(table, month) for table in PARTITIONED_TABLES}
+    missing = [table for table in names if not partition_exists(conn, names[table])]
+    if not missing:
+        return list(names.values())
+
+    start, end = month_bounds(month)
+    bounds = f"FOR VALUES FROM ({start}) TO ({end})"
+    for table in PARTITIONED_TABLES:
+        conn.exec_driver_sql(
+            f"LOCK TABLE {quote(conn, table)} IN ACCESS EXCLUSIVE MODE"
+        )
+    moving = [table for table in missing if default_rows_in(conn, table, month)]
+    for table in missing:
+        name, parent = quote(conn, names[table]), quote(conn, table)
+        if table not in moving:
+            conn.exec_driver_sql(f"CREATE TABLE {name} PARTITION OF {parent} {bounds}")
+            continue
+        conn.exec_driver_sql(f"CREATE TABLE {name} (LIKE {parent} INCLUDING DEFAULTS)")
+        conn.exec_driver_sql(
+            f"INSERT INTO {name} SELECT * FROM {quote(conn, f'{table}_default')} "
+            f"WHERE {in_month(conn, table, month)}"
+        )
+    # items first, deleting orders would cascade to them
+    for table in reversed(moving):
+        conn.exec_driver_sql(
+            f"DELETE FROM {quote(conn, f'{table}_default')} "
+            f"WHERE {in_month(conn, table, month)}"
+        )
+    for table in moving:
+        conn.exec_driver_sql(
+            f"ALTER TABLE {quote(conn, table)} "
+            f"ATTACH PARTITION {quote(conn, names[table])} {bounds}"
+        )
+    return list(names.values())
+
+
+def ensure_partitions(
+    conn: Connection, *, ahead: int, now: float | None = None
+) -> list[str]:
+    """
+    Create the partitions of the current month and `ahead` months after it for
+    every partitioned table, see create_partitions.
+    """
+    first = month_of(datetime.now(UTC).timestamp() if now is None else now)
+    names = []
+    for months in range(ahead + 1):
+        names.extend(create_partitions(conn, add_months(first, months)))
+    return names
+
+
+def list_partitions(conn: Connection, table: str) -> list[Partition]:
+    rows = conn.execute(
+        PARTITIONS_QUERY, {"parent": quote(conn, table), "prefix": f"{table}_"}
+    )
+    partitions = [parse_partition(table, name, attached) for name, attached in rows]
+    return sorted((p for p in partitions if p is not None), key=lambda p: p.month)
+
+
+def default_partition_rows(conn: Connection, table: str) -> int:
+    name = quote(conn, f"{table}_default")
+    return int(conn.exec_driver_sql(f"SELECT count(*) FROM {name}").scalar_one())
+
+
+def detach_partition(conn: Connection, partition: Partition) -> None:
+    conn.exec_driver_sql(
+        f"ALTER TABLE {quote(conn, partition.table)} "
+        f"DETACH PARTITION {quote(conn, partition.name)}"
+    )
@@ -0,0 +1,113 @@
+import bisect
+import threading
+import time
+from typing import Any
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.pool.base import ConnectionPoolEntry
+
+from app.models import HistogramStats, PoolStats
+
+# Upper bounds in seconds for the checkout wait histogram
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class Histogram:
+    """
+    Thread-safe fixed-bucket histogram, reported with cumulative counts.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = WAIT_BUCKETS) -> None:
+        self.bounds = buckets
+        self._counts = [0] * (len(buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def stats(self) -> HistogramStats:
+        with self._lock:
+            counts, total = list(self._counts), self._sum
+        buckets: dict[str, int] = {}
+        running = 0
+        for bound, count in zip([*map(str, self.bounds), "+Inf"], counts, strict=True):
+            running += count
+            buckets[bound] = running
+        return HistogramStats(buckets=buckets, count=running, sum=total)
+
+
+class PoolMetrics:
+    def __init__(self) -> None:
+        self.checkout_wait = Histogram()
+        self.opened = 0
+        self.closed = 0
+        self._lock = threading.Lock()
+
+    def connection_opened(self) -> None:
+        with self._lock:
+            self.opened += 1
+
+    def connection_closed(self) -> None:
+        with self._lock:
+            self.closed += 1
+
+
+class InstrumentedPoolMixin:
+    """
+    Records how long checkouts wait on the pool and how many connections get
+    opened and closed. Metrics carry over when `engine.dispose()` recreates
+    the pool.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def recreate(self) -> Any:
+        pool = super().recreate()  # type: ignore[misc]
+        pool.metrics = self.metrics
+        return pool
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        start = time.perf_counter()
+        try:
+            return super()._do_get()  # type: ignore[misc, no-any-return]
+        finally:
+            self.metrics.checkout_wait.observe(time.perf_counter() - start)
+
+    def _create_connection(self) -> ConnectionPoolEntry:
+        entry = super()._create_connection()  # type: ignore[misc]
+        self.metrics.connection_opened()
+        return entry  # type: ignore[no-any-return]
+
+    def _close_connection(self, connection: Any, *, terminate: bool = False) -> None:
+        try:
+            super()._close_connection(connection, terminate=terminate)  # type: ignore[misc]
+        finally:
+            self.metrics.connection_closed()
+
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_stats(pool: InstrumentedQueuePool | InstrumentedAsyncQueuePool) -> PoolStats:
+    return PoolStats(
+        size=pool.size(),
+        checked_out=pool.checkedout(),
+        checked_in=pool.checkedin(),
+        # overflow() counts up from -pool_size, it is positive once the pool is full
+        overflow=max(pool.overflow(), 0),
+        max_overflow=pool._max_overflow,
+        connections_opened=pool.metrics.opened,
+        connections_closed=pool.metrics.closed,
+        checkout_wait=pool.metrics.checkout_wait.stats(),
+    )
@@ -0,0 +1,131 @@
+import asyncio
+import random
+import time
+from collections import OrderedDict
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Protocol
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+@dataclass(frozen=True)
+class Rate:
+    """
+    A token bucket holding `count` tokens that refills completely over
+    `period` seconds.
+    """
+
+    count: int
+    period: float
+
+    @classmethod
+    def parse(cls, value: str) -> "Rate":
+        """
+        Parse a rate like "5/minute".
+        """
+        count, _, period = value.partition("/")
+        if period not in PERIODS or not count.isdigit() or int(count) <= 0:
+            raise ValueError(value)
+        return cls(int(count), PERIODS[period])
+
+    @property
+    def interval(self) -> float:
+        # seconds to refill one token
+        return self.period / self.count
+
+
+class RateLimitBackend(Protocol):
+    async def acquire(self, buckets: Sequence[tuple[str, Rate]]) -> float:
+        """
+        Take a token from each of the (key, rate) `buckets`, or from none of
+        them when one is empty. Returns 0 when they were taken, otherwise the
+        seconds until the empty buckets have a token again.
+        """
+        ...
+
+
+# Buckets are stored as the time they will be full again. Taking a token
+# pushes that time one interval further, which is allowed as long as it stays
+# within one period from now. An unknown or past time is a full bucket.
+
+
+class MemoryBackend:
+    """
+    Buckets in this process only, so each worker enforces its own limits.
+    The least recently used buckets past `maxsize` are forgotten.
+    """
+
+    def __init__(self, maxsize: int = 100_000) -> None:
+        self.maxsize = maxsize
+        self._full_at: OrderedDict[str, float] = OrderedDict()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, buckets: Sequence[tuple[str, Rate]]) -> float:
+        now = time.time()
+        async with self._lock:
+            taken = {}
+            wait = 0.0
+            for key, rate in buckets:
+                full_at = max(self._full_at.get(key, now), now) + rate.interval
+                wait = max(wait, full_at - now - rate.period)
+                taken[key] = full_at
+            if wait > 0:
+                return wait
+            for key, full_at in taken.items():
+                self._full_at[key] = full_at
+                self._full_at.move_to_end(key)
+            while len(self._full_at) > self.maxsize:
+                self._full_at.popitem(last=False)
+        return 0.0
+
+
+ACQUIRE = text(
+    "INSERT INTO ratelimitbucket AS b (key, full_at) "
+    "VALUES (:key, extract(epoch FROM now()) + :interval) "
+    "ON CONFLICT (key) DO UPDATE "
+    "SET full_at = greatest(b.full_at, extract(epoch FROM now())) + :interval "
+    "WHERE greatest(b.full_at, extract(epoch FROM now())) + :interval "
+    "<= extract(epoch FROM now()) + :period "
+    "RETURNING full_at"
+)
+WAIT = text(
+    "SELECT full_at - extract(epoch FROM now()) FROM ratelimitbucket WHERE key = :key"
+)
+PRUNE = text("DELETE FROM ratelimitbucket WHERE full_at < extract(epoch FROM now())")
+
+
+class PostgresBackend:
+    """
+    Buckets in the ratelimitbucket table, shared by every worker and node.
+
+    Each bucket is taken with an upsert that only moves it when a token is
+    available, so concurrent requests can't overdraw it, and all of them in
+    one transaction that is rolled back when one is empty. Times come from
+    the database clock. Full buckets are deleted now and then, one call in
+    `1 / prune_rate` does it.
+    """
+
+    def __init__(self, engine: AsyncEngine, prune_rate: float = 0.001) -> None:
+        self.engine = engine
+        self.prune_rate = prune_rate
+
+    async def acquire(self, buckets: Sequence[tuple[str, Rate]]) -> float:
+        # buckets are locked in key order so concurrent calls can't deadlock
+        buckets = sorted(buckets, key=lambda bucket: bucket[0])
+        async with self.engine.connect() as conn:
+            if random.random() < self.prune_rate:
+                await conn.execute(PRUNE)
+            for key, rate in buckets:
+                params = {"key": key, "interval": rate.interval, "period": rate.period}
+                if (await conn.execute(ACQUIRE, params)).first():
+                    continue
+                # give back the tokens taken from the buckets before it
+                await conn.rollback()
+                remaining = (await conn.execute(WAIT, {"key": key})).scalar() or 0.0
+                return max(remaining + rate.interval - rate.period, 0.001)
+            await conn.commit()
+        return 0.0
@@ -0,0 +1,84 @@
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# Seconds the replica is behind the primary, 0 when it has replayed all the WAL
+# it received. Run against the primary itself it is always 0.
+LAG_QUERY = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() "
+    "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE coalesce(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0) "
+    "END"
+)
+
+
+@dataclass
+class Replica:
+    engine: AsyncEngine
+    healthy: bool = True
+    lag: float = 0.0
+
+
+class ReplicaRouter:
+    """
+    Picks the engine a read-only request runs on.
+
+    Replica health and lag are refreshed at most every `check_interval`
+    seconds, by whichever request first finds them stale. Reads go to a random
+    healthy replica within `max_lag`, or to the primary when there is none or
+    the caller asks for it, e.g. right after a write.
+    """
+
+    def __init__(
+        self,
+        primary: AsyncEngine,
+        replicas: list[AsyncEngine],
+        *,
+        max_lag: float,
+        check_interval: float,
+    ) -> None:
+        self.primary = primary
+        self.replicas = [Replica(engine) for engine in replicas]
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._checked_at: float | None = None
+        self._lock = asyncio.Lock()
+
+    async def check(self, replica: Replica) -> None:
+        try:
+            async with replica.engine.connect() as connection:
+                lag = await asyncio.wait_for(
+                    connection.scalar(LAG_QUERY), timeout=self.check_interval
+                )
+        except Exception:
+            if replica.healthy:
+                logger.exception(
+                    "read replica {url} is unreachable", url=replica.engine.url
+                )
+            replica.healthy = False
+        else:
+            replica.healthy, replica.lag = True, float(lag or 0)
+
+    async def refresh(self) -> None:
+        async with self._lock:
+            now = time.monotonic()
+            if self._checked_at and now - self._checked_at < self.check_interval:
+                return
+            await asyncio.gather(*(self.check(replica) for replica in self.replicas))
+            self._checked_at = time.monotonic()
+
+    async def choose(self, primary: bool = False) -> AsyncEngine:
+        if not self.replicas or primary:
+            return self.primary
+        await self.refresh()
+        candidates = [
+            replica.engine
+            for replica in self.replicas
+            if replica.healthy and replica.lag <= self.max_lag
+        ]
+        return random.choice(candidates) if candidates else self.primary
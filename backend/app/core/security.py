@@ -1,12 +1,83 @@
+import multiprocessing
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
 from datetime import UTC, datetime, timedelta
-from typing import Any
+from typing import Any, TypeVar
 
 import jwt
-from passlib.context import CryptContext
 
+from app.core import hashing
 from app.core.config import settings
+from app.core.pool import Histogram
+from app.models import WorkerPoolStats
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+R = TypeVar("R")
+
+# Upper bounds in seconds for the time a hash or verify takes, queueing included
+HASH_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class PasswordPool:
+    """
+    Runs bcrypt on a pool of `workers` processes, or inline when it is 0.
+
+    Each call takes hundreds of milliseconds of CPU. In a request thread that
+    would stall the worker's other requests, here the thread just waits on
+    the result. Calls beyond the pool size queue up, `pending` counts them
+    along with the running ones.
+    """
+
+    def __init__(self, workers: int, rounds: int) -> None:
+        self.workers = workers
+        self.rounds = rounds
+        self.pending = 0
+        self.max_pending = 0
+        self.completed = 0
+        self.duration = Histogram(HASH_BUCKETS)
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def run(self, fn: Callable[..., R], *args: Any) -> R:
+        if self.workers <= 0:
+            return fn(*args, self.rounds)
+        with self._lock:
+            if self._executor is None:
+                # spawned rather than forked, the server already runs threads
+                self._executor = ProcessPoolExecutor(
+                    self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            executor = self._executor
+            self.pending += 1
+            self.max_pending = max(self.max_pending, self.pending)
+        started = time.perf_counter()
+        try:
+            return executor.submit(fn, *args, self.rounds).result()
+        finally:
+            self.duration.observe(time.perf_counter() - started)
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+
+    def stats(self) -> WorkerPoolStats:
+        with self._lock:
+            return WorkerPoolStats(
+                workers=self.workers,
+                pending=self.pending,
+                max_pending=self.max_pending,
+                completed=self.completed,
+                duration=self.duration.stats(),
+            )
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+
+password_pool = PasswordPool(settings.PASSWORD_HASH_WORKERS, settings.BCRYPT_ROUNDS)
 
 
 ALGORITHM = "HS256"
@@ -21,8 +92,14 @@ def create_access_token(
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_pool.run(hashing.verify_password, plain_password, hashed_password)
+
+
+def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    return password_pool.run(hashing.verify_and_update, plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return password_pool.run(hashing.hash_password, password)
@@ -0,0 +1,102 @@
+import json
+import random
+import threading
+from collections.abc import Mapping
+from datetime import UTC, datetime
+from typing import Any
+
+from loguru import logger
+
+from app.core.config import settings
+
+EXPLAIN_SAVEPOINT = "slow_query_explain"
+
+
+def redact(value: Any) -> Any:
+    """
+    Replace string and byte parameters, where emails, names and tokens end
+    up, with their length. Numbers, ids and timestamps are kept since they are
+    what makes a plan reproducible.
+    """
+    if isinstance(value, Mapping):
+        return {key: redact(item) for key, item in value.items()}
+    if isinstance(value, list | tuple):
+        return [redact(item) for item in value]
+    if isinstance(value, str | bytes):
+        return f"<{type(value).__name__} len={len(value)}>"
+    return value
+
+
+class SlowQueryLog:
+    """
+    Appends statements over `threshold_ms` to a JSON lines file, tagged with
+    the route that issued them. A `explain_rate` share of slow SELECTs is run
+    again under EXPLAIN (ANALYZE, BUFFERS) inside a savepoint that is rolled
+    back, so the plan reflects the parameters actually used.
+    """
+
+    def __init__(self, path: str, threshold_ms: float, explain_rate: float) -> None:
+        self.path = path
+        self.threshold_ms = threshold_ms
+        self.explain_rate = explain_rate
+        self._lock = threading.Lock()
+
+    def is_slow(self, duration: float) -> bool:
+        return duration * 1000 >= self.threshold_ms
+
+    def explain(self, conn: Any, statement: str, parameters: Any) -> str | None:
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.execute(f"SAVEPOINT {EXPLAIN_SAVEPOINT}")
+            try:
+                cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters)
+                return "\n".join(row[0] for row in cursor.fetchall())
+            finally:
+                cursor.execute(f"ROLLBACK TO SAVEPOINT {EXPLAIN_SAVEPOINT}")
+                cursor.execute(f"RELEASE SAVEPOINT {EXPLAIN_SAVEPOINT}")
+        except Exception:
+            logger.exception("unable to explain slow query")
+            return None
+        finally:
+            cursor.close()
+
+    def record(
+        self,
+        conn: Any,
+        statement: str,
+        parameters: Any,
+        duration: float,
+        *,
+        executemany: bool = False,
+        route: str | None = None,
+    ) -> None:
+        plan = None
+        if (
+            not executemany
+            and statement.lstrip().upper().startswith("SELECT")
+            and random.random() < self.explain_rate
+        ):
+            plan = self.explain(conn, statement, parameters)
+
+        entry = {
+            "timestamp": datetime.now(UTC).isoformat(),
+            "route": route,
+            "duration_ms": round(duration * 1000, 3),
+            "statement": statement,
+            "parameters": redact(parameters),
+            "plan": plan,
+        }
+        line = json.dumps(entry, default=str)
+        with self._lock, open(self.path, "a") as f:
+            f.write(line + "\n")
+
+
+slow_query_log = (
+    SlowQueryLog(
+        settings.SLOW_QUERY_LOG_FILE,
+        threshold_ms=settings.SLOW_QUERY_MS,
+        explain_rate=settings.SLOW_QUERY_EXPLAIN_RATE,
+    )
+    if settings.SLOW_QUERY_LOG_FILE
+    else None
+)
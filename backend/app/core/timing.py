@@ -0,0 +1,143 @@
+import time
+from collections import defaultdict
+from collections.abc import Awaitable, Callable, MutableMapping
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+from fastapi import Request, Response
+from loguru import logger
+from sqlalchemy import Engine, event
+
+from app.core.config import settings
+from app.core.slow_queries import slow_query_log
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    duration: float = 0.0
+    statements: list[tuple[str, float]] = field(default_factory=list)
+    # ASGI scope of the request, routing adds the matched route to it
+    scope: MutableMapping[str, Any] = field(default_factory=dict)
+
+    @property
+    def route_id(self) -> str | None:
+        route = self.scope.get("route")
+        return getattr(route, "unique_id", None)
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        self.statements.append((statement, duration))
+
+    def summary(self, limit: int = 10) -> list[tuple[str, int, float]]:
+        """
+        Distinct statements with how often they ran and their total duration,
+        most expensive first.
+        """
+        totals: dict[str, list[float]] = defaultdict(list)
+        for statement, duration in self.statements:
+            totals[statement].append(duration)
+        ranked = sorted(totals.items(), key=lambda item: sum(item[1]), reverse=True)
+        return [
+            (statement, len(durations), sum(durations))
+            for statement, durations in ranked[:limit]
+        ]
+
+
+# Set by the server_timing middleware for the duration of a request. Sync
+# routes run on a copy of the request context and async sessions carry it
+# into their greenlet, so both see the same QueryStats.
+current_queries: ContextVar[QueryStats | None] = ContextVar(
+    "current_queries", default=None
+)
+
+
+def before_cursor_execute(conn: Any, *_: Any) -> None:
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def after_cursor_execute(
+    conn: Any,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: Any,
+    executemany: bool,
+) -> None:
+    duration = time.perf_counter() - conn.info["query_start"].pop()
+    stats = current_queries.get()
+    if stats is not None:
+        stats.record(statement, duration)
+    if slow_query_log is not None and slow_query_log.is_slow(duration):
+        slow_query_log.record(
+            conn,
+            statement,
+            parameters,
+            duration,
+            executemany=executemany,
+            route=stats.route_id if stats else None,
+        )
+
+
+def handle_error(context: Any) -> None:
+    if context.connection is not None and context.connection.info.get("query_start"):
+        context.connection.info["query_start"].pop()
+
+
+def track_queries(engine: Engine) -> None:
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(engine, "handle_error", handle_error)
+
+
+async def server_timing(
+    request: Request, call_next: Callable[[Request], Awaitable[Response]]
+) -> Response:
+    """
+    Report statement count and DB time of each request in a Server-Timing
+    header and a log line, listing the statements of requests over the
+    SLOW_REQUEST_* thresholds.
+    """
+    stats = QueryStats(scope=request.scope)
+    token = current_queries.set(stats)
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        current_queries.reset(token)
+    total_ms = (time.perf_counter() - start) * 1000
+    db_ms = stats.duration * 1000
+
+    response.headers["Server-Timing"] = (
+        f'db;dur={db_ms:.1f};desc="{stats.count} queries", total;dur={total_ms:.1f}'
+    )
+    logger.debug(
+        "{method} {path} {status} ran {queries} queries, "
+        "db {db_ms:.1f}ms of {total_ms:.1f}ms",
+        method=request.method,
+        path=request.url.path,
+        status=response.status_code,
+        queries=stats.count,
+        db_ms=db_ms,
+        total_ms=total_ms,
+    )
+    if (
+        stats.count > settings.SLOW_REQUEST_QUERIES
+        or db_ms > settings.SLOW_REQUEST_DB_MS
+    ):
+        statements = "\n".join(
+            f"{count}x {duration * 1000:.1f}ms {statement}"
+            for statement, count, duration in stats.summary()
+        )
+        logger.warning(
+            "{method} {path} exceeded query budget with {queries} queries "
+            "in {db_ms:.1f}ms\n{statements}",
+            method=request.method,
+            path=request.url.path,
+            queries=stats.count,
+            db_ms=db_ms,
+            statements=statements,
+        )
+    return response
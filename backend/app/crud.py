@@ -1,34 +1,61 @@
+import itertools
 import uuid
-from typing import Any
+from collections import defaultdict
+from collections.abc import Collection, Iterable
+from typing import Any, TypeVar
 
-from loguru import logger
-from sqlmodel import Session, select
+from sqlalchemy import case, delete, insert, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlmodel import Session, SQLModel, col, func, select
 
-from app.core.security import get_password_hash, verify_password
+from app.core.cache import invalidate_product, invalidate_user
+from app.core.ids import uuid7
+from app.core.security import get_password_hash, verify_and_update_password
+from app.errors import MissingResourcesError
 from app.models import (
+    NOW_FACTORY,
     Category,
     CategoryCreate,
     Order,
     OrderCreate,
     OrderUpdate,
     Product,
+    ProductCategoryLink,
     ProductCreate,
+    RATING_BUCKETS,
     Review,
     ReviewCreate,
     User,
     UserCreate,
     UserUpdate,
+    WebhookEvent,
+    WebhookEventStatus,
 )
 
+T = TypeVar("T", bound=SQLModel)
+
+# Rows per multi-row INSERT in the bulk writes
+BULK_BATCH_SIZE = 500
+
+
+def save(*, session: Session, db_obj: T) -> T:
+    """
+    Commit `db_obj` and return it as flushed, without a refresh SELECT.
+
+    Server-generated columns come back through INSERT/UPDATE ... RETURNING
+    (see BaseTable) and request sessions don't expire on commit, so the
+    object already matches its row.
+    """
+    session.add(db_obj)
+    session.commit()
+    return db_obj
+
 
 def create_user(*, session: Session, user_create: UserCreate) -> User:
     db_obj = User.model_validate(
         user_create, update={"hashed_password": get_password_hash(user_create.password)}
     )
-    session.add(db_obj)
-    session.commit()
-    session.refresh(db_obj)
-    return db_obj
+    return save(session=session, db_obj=db_obj)
 
 
 def update_user(*, session: Session, db_user: User, user_in: UserUpdate) -> Any:
@@ -39,9 +66,8 @@ def update_user(*, session: Session, db_user: User, user_in: UserUpdate) -> Any:
         hashed_password = get_password_hash(password)
         extra_data["hashed_password"] = hashed_password
     db_user.sqlmodel_update(user_data, update=extra_data)
-    session.add(db_user)
-    session.commit()
-    session.refresh(db_user)
+    save(session=session, db_obj=db_user)
+    invalidate_user(db_user.id)
     return db_user
 
 
@@ -54,24 +80,27 @@ def authenticate(*, session: Session, email: str, password: str) -> User | None:
     db_user = get_user_by_email(session=session, email=email)
     if not db_user:
         return None
-    if not verify_password(password, db_user.hashed_password):
+    valid, new_hash = verify_and_update_password(password, db_user.hashed_password)
+    if not valid:
         return None
+    if new_hash:
+        # hashed with outdated cost parameters, upgrade it while we have the
+        # plain password
+        db_user.hashed_password = new_hash
+        save(session=session, db_obj=db_user)
+        invalidate_user(db_user.id)
     return db_user
 
 
 def create_category(*, session: Session, category_in: CategoryCreate) -> Category:
     db_item = Category.model_validate(category_in)
-    session.add(db_item)
-    session.commit()
-    session.refresh(db_item)
-    return db_item
+    return save(session=session, db_obj=db_item)
 
 
 def create_product(*, session: Session, product_in: ProductCreate) -> Product:
     db_item = Product.model_validate(product_in)
-    session.add(db_item)
-    session.commit()
-    session.refresh(db_item)
+    save(session=session, db_obj=db_item)
+    invalidate_product(db_item.id)
     return db_item
 
 
@@ -86,45 +115,357 @@ def create_product_review(
         review_in, update={"product_id": product, "customer_id": customer}
     )
     session.add(db_item)
+    update_product_rating(session=session, id=product, added=db_item.rating)
     session.commit()
-    session.refresh(db_item)
+    invalidate_product(product)
     return db_item
 
 
-def update_product_categories(*, session: Session, id: uuid.UUID) -> Product:
-    product = session.exec(select(Product).where(Product.id == id)).first()
-    if not product:
-        raise ValueError
+def rating_bucket(rating: float) -> int:
+    return min(max(round(rating * 2), 0), RATING_BUCKETS - 1)
 
-    cat = session.exec(select(Category).where(Category.name == "beans")).first()
-    if cat:
-        product.categories.append(cat)
 
-    logger.debug(
-        "{count} categories in product {id}",
-        count=len(product.categories),
-        id=product.id,
+def update_product_rating(
+    *,
+    session: Session,
+    id: uuid.UUID,
+    added: float | None = None,
+    removed: float | None = None,
+) -> None:
+    """
+    Fold an added and/or removed review rating into the product aggregates.
+
+    Runs as a single UPDATE in the caller's transaction, so it commits or
+    rolls back together with the review write.
+    """
+    count_delta = (added is not None) - (removed is not None)
+    sum_delta = (added or 0) - (removed or 0)
+    new_count = col(Product.rating_count) + count_delta
+    values: dict[Any, Any] = {
+        Product.rating_count: new_count,
+        Product.rating_avg: case(
+            (new_count <= 0, 0),
+            else_=(Product.rating_avg * Product.rating_count + sum_delta) / new_count,
+        ),
+    }
+
+    buckets: dict[int, int] = defaultdict(int)
+    if added is not None:
+        buckets[rating_bucket(added)] += 1
+    if removed is not None:
+        buckets[rating_bucket(removed)] -= 1
+    for bucket, delta in buckets.items():
+        if delta:
+            values[Product.rating_histogram[bucket]] = (
+                Product.rating_histogram[bucket] + delta
+            )
+
+    statement = update(Product).where(Product.id == id).values(values)  # type: ignore[arg-type]
+    session.execute(statement.execution_options(synchronize_session=False))
+
+
+def recompute_product_ratings(
+    *, session: Session, product_ids: Collection[uuid.UUID] | None = None
+) -> int:
+    """
+    Rebuild review aggregates from the review table, for every product or
+    only `product_ids`.
+    """
+    # one expression object so SELECT and GROUP BY share its bind parameter
+    doubled = func.round(col(Review.rating) * 2)
+    statement = select(
+        col(Review.product_id), doubled, func.count(), func.sum(col(Review.rating))
+    ).group_by(col(Review.product_id), doubled)
+    reset = update(Product).values(
+        rating_avg=0, rating_count=0, rating_histogram=[0] * RATING_BUCKETS
+    )
+    if product_ids is not None:
+        statement = statement.where(Review.product_id.in_(product_ids))  # type: ignore[attr-defined]
+        reset = reset.where(Product.id.in_(product_ids))  # type: ignore[attr-defined]
+
+    totals: dict[uuid.UUID, tuple[int, float, list[int]]] = {}
+    for product_id, bucket, count, rating_sum in session.exec(statement).all():
+        prev_count, prev_sum, histogram = totals.get(
+            product_id, (0, 0.0, [0] * RATING_BUCKETS)
+        )
+        histogram[rating_bucket(bucket / 2)] += count
+        totals[product_id] = (prev_count + count, prev_sum + rating_sum, histogram)
+
+    session.execute(reset)
+    if totals:
+        session.execute(
+            update(Product),
+            [
+                {
+                    "id": product_id,
+                    "rating_avg": rating_sum / count,
+                    "rating_count": count,
+                    "rating_histogram": histogram,
+                }
+                for product_id, (count, rating_sum, histogram) in totals.items()
+            ],
+        )
+    session.commit()
+    if product_ids is None:
+        invalidate_product()
+    else:
+        for id in product_ids:
+            invalidate_product(id)
+    return len(totals)
+
+
+def upsert_rows(
+    *,
+    session: Session,
+    model: type[T],
+    rows: Iterable[T],
+    conflict: Any = None,
+    update_columns: Iterable[str] = (),
+    batch_size: int = BULK_BATCH_SIZE,
+) -> list[uuid.UUID]:
+    """
+    Write `rows` with multi-row INSERT ... ON CONFLICT statements, `batch_size`
+    rows per statement, and return their ids in input order.
+
+    On a conflict with the `conflict` column the `update_columns` are
+    overwritten, or the row is skipped and returns no id when there are none.
+    A statement can't update a row twice, so rows of a batch sharing a
+    `conflict` value are collapsed to the last of them and return one id.
+    Ids are read back through RETURNING, so an updated row reports the id it
+    already had. Nothing is committed.
+    """
+    table = model.__table__  # type: ignore[attr-defined]
+    columns = {column.name for column in table.columns if column.computed is None}
+    key = table.c.id if conflict is None else conflict
+    insert_ = pg_insert(model)
+    updates = {name: insert_.excluded[name] for name in update_columns}
+    if conflict is not None and updates:
+        updates["updated_at"] = insert_.excluded.updated_at
+        insert_ = insert_.on_conflict_do_update(index_elements=[conflict], set_=updates)
+    elif conflict is not None:
+        insert_ = insert_.on_conflict_do_nothing(index_elements=[conflict])
+    # Rows are matched back by key. sort_by_parameter_order can't match an
+    # updated row's id to the one sent, and falls back to a row per statement.
+    statement = insert_.returning(key, table.c.id)
+
+    ids: list[uuid.UUID] = []
+    for batch in itertools.batched(rows, batch_size):
+        params = {
+            p[key.key]: p for p in (row.model_dump(include=columns) for row in batch)
+        }
+        result = session.execute(statement, list(params.values()))
+        written = dict(result.tuples().all())
+        ids.extend(written[k] for k in params if k in written)
+    return ids
+
+
+def bulk_upsert_products(
+    *, session: Session, products_in: Iterable[ProductCreate]
+) -> list[uuid.UUID]:
+    """
+    Create products or update them in place by stripe id, committed once.
+    """
+    ids = upsert_rows(
+        session=session,
+        model=Product,
+        rows=(Product.model_validate(p) for p in products_in),
+        conflict=Product.stripe_id,
+        update_columns=ProductCreate.model_fields.keys() - {"stripe_id"},
     )
-    session.add(product)
     session.commit()
-    session.refresh(product)
-    return product
+    for id in ids:
+        invalidate_product(id)
+    return ids
+
+
+def bulk_upsert_categories(
+    *, session: Session, categories_in: Iterable[CategoryCreate]
+) -> list[uuid.UUID]:
+    """
+    Create categories or update them in place by name, committed once.
+    """
+    ids = upsert_rows(
+        session=session,
+        model=Category,
+        rows=(Category.model_validate(c) for c in categories_in),
+        conflict=Category.name,
+        update_columns=CategoryCreate.model_fields.keys() - {"name"},
+    )
+    session.commit()
+    return ids
+
+
+def bulk_create_reviews(
+    *,
+    session: Session,
+    reviews_in: dict[uuid.UUID, list[ReviewCreate]],
+    customer: uuid.UUID,
+) -> list[uuid.UUID]:
+    """
+    Create reviews by `customer`, keyed by product id, and rebuild the
+    aggregates of the reviewed products in the same commit.
+    """
+    reviews = (
+        Review.model_validate(
+            review_in, update={"product_id": product_id, "customer_id": customer}
+        )
+        for product_id, product_reviews in reviews_in.items()
+        for review_in in product_reviews
+    )
+    ids = upsert_rows(session=session, model=Review, rows=reviews)
+    recompute_product_ratings(session=session, product_ids=reviews_in.keys())
+    return ids
+
+
+def assign_product_categories(
+    *, session: Session, assignments: dict[uuid.UUID, list[uuid.UUID]]
+) -> None:
+    """
+    Replace the categories of many products in one transaction.
+
+    Products and categories are each validated with a single IN query, then
+    only the difference to the existing links is deleted and inserted.
+    """
+    product_ids = set(assignments)
+    category_ids = {i for ids in assignments.values() for i in ids}
+
+    found_products = set(
+        session.exec(select(Product.id).where(Product.id.in_(product_ids))).all()  # type: ignore[attr-defined]
+    )
+    if missing := product_ids - found_products:
+        raise MissingResourcesError("Product", missing)
+    found_categories = set(
+        session.exec(select(Category.id).where(Category.id.in_(category_ids))).all()  # type: ignore[attr-defined]
+    )
+    if missing := category_ids - found_categories:
+        raise MissingResourcesError("Category", missing)
+
+    desired = {(p, c) for p, ids in assignments.items() for c in ids}
+    link_key = (
+        col(ProductCategoryLink.product_id),
+        col(ProductCategoryLink.category_id),
+    )
+    existing = set(
+        session.exec(select(*link_key).where(link_key[0].in_(product_ids))).all()
+    )
+    if to_delete := existing - desired:
+        session.execute(
+            delete(ProductCategoryLink).where(tuple_(*link_key).in_(to_delete))
+        )
+    if to_insert := desired - existing:
+        now = NOW_FACTORY()
+        session.execute(
+            insert(ProductCategoryLink),
+            [
+                {
+                    "id": uuid7(),
+                    "created_at": now,
+                    "updated_at": now,
+                    "product_id": p,
+                    "category_id": c,
+                }
+                for p, c in to_insert
+            ],
+        )
+    session.commit()
+    for id in product_ids:
+        invalidate_product(id)
 
 
 def create_order(
     *, session: Session, order_in: OrderCreate, customer: uuid.UUID
 ) -> Order:
     db_item = Order.model_validate(order_in, update={"customer_id": customer})
-    session.add(db_item)
-    session.commit()
-    session.refresh(db_item)
-    return db_item
+    return save(session=session, db_obj=db_item)
 
 
 def update_order(*, session: Session, db_order: Order, order_in: OrderUpdate) -> Order:
     order_data = order_in.model_dump(exclude_unset=True)
     db_order.sqlmodel_update(order_data)
-    session.add(db_order)
+    return save(session=session, db_obj=db_order)
+
+
+def enqueue_webhook_event(
+    *, session: Session, event: dict[str, Any]
+) -> uuid.UUID | None:
+    """
+    Store a verified Stripe event in the inbox, due now, and commit. Returns
+    None for an event that was already received.
+    """
+    row = WebhookEvent(
+        stripe_id=event["id"],
+        type=event["type"],
+        payload=event,
+        next_attempt_at=NOW_FACTORY(),
+    )
+    ids = upsert_rows(
+        session=session,
+        model=WebhookEvent,
+        rows=[row],
+        conflict=WebhookEvent.stripe_id,
+    )
+    session.commit()
+    return ids[0] if ids else None
+
+
+def claim_webhook_event(
+    *, session: Session, now: int, lease: int
+) -> WebhookEvent | None:
+    """
+    Take the longest due event, pending or held by an expired lease, count
+    the attempt and hold it for `lease` seconds, committed. SKIP LOCKED lets
+    concurrent workers claim different events.
+    """
+    due = (
+        select(WebhookEvent.id)
+        .where(
+            col(WebhookEvent.status).in_(
+                [WebhookEventStatus.PENDING, WebhookEventStatus.PROCESSING]
+            ),
+            WebhookEvent.next_attempt_at <= now,
+        )
+        .order_by(col(WebhookEvent.next_attempt_at))
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    statement = (
+        update(WebhookEvent)
+        .where(col(WebhookEvent.id) == due)
+        .values(
+            status=WebhookEventStatus.PROCESSING,
+            attempts=WebhookEvent.attempts + 1,
+            next_attempt_at=now + lease,
+        )
+        .returning(WebhookEvent)
+    )
+    event = session.execute(statement).scalar_one_or_none()
     session.commit()
-    session.refresh(db_order)
-    return db_order
+    return event
+
+
+def finish_webhook_event(
+    *,
+    session: Session,
+    event: WebhookEvent,
+    error: str | None = None,
+    retry_at: int | None = None,
+) -> WebhookEvent:
+    """
+    Mark a claimed event done, or failed with `error`: pending again from
+    `retry_at`, or dead without one.
+    """
+    if error is None:
+        status = WebhookEventStatus.DONE
+    elif retry_at is None:
+        status = WebhookEventStatus.DEAD
+    else:
+        status = WebhookEventStatus.PENDING
+    event.sqlmodel_update(
+        {
+            "status": status,
+            "last_error": error,
+            "next_attempt_at": event.next_attempt_at if retry_at is None else retry_at,
+        }
+    )
+    return save(session=session, db_obj=event)
@@ -1,2 +1,15 @@
+import uuid
+from collections.abc import Iterable
+
+
 class ResourceNotFoundError(Exception):
     pass
+
+
+class MissingResourcesError(ResourceNotFoundError):
+    def __init__(self, resource: str, ids: Iterable[uuid.UUID]) -> None:
+        self.resource = resource
+        self.ids = sorted(ids)
+        super().__init__(
+            f"{resource} with id {', '.join(map(str, self.ids))} does not exist"
+        )
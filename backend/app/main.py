@@ -1,10 +1,18 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 import sentry_sdk
 from fastapi import FastAPI
 from fastapi.routing import APIRoute
 from starlette.middleware.cors import CORSMiddleware
 
 from app.api.main import api_router
+from app.core.cache import invalidation_channel
 from app.core.config import settings
+from app.core.db import async_engine, replica_engines
+from app.core.security import password_pool
+from app.core.timing import server_timing
+from app.webhook_inbox import webhook_inbox
 
 
 def custom_generate_unique_id(route: APIRoute) -> str:
@@ -14,11 +22,27 @@ def custom_generate_unique_id(route: APIRoute) -> str:
 if settings.SENTRY_DSN and settings.ENVIRONMENT != "local":
     sentry_sdk.init(dsn=str(settings.SENTRY_DSN), enable_tracing=True)
 
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    invalidation_channel.start()
+    webhook_inbox.start()
+    yield
+    webhook_inbox.close()
+    invalidation_channel.close()
+    password_pool.shutdown()
+    # async connections are tied to the event loop that opened them
+    await async_engine.dispose()
+    for replica in replica_engines:
+        await replica.dispose()
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     generate_unique_id_function=custom_generate_unique_id,
     servers=[{"url": "http://localhost:8000"}],
+    lifespan=lifespan,
     description="API for the Cyborg Coffeeshop store",
     contact={
         "name": settings.PROJECT_CONTACT_NAME,
@@ -37,4 +61,6 @@ if settings.all_cors_origins:
         allow_headers=["*"],
     )
 
+app.middleware("http")(server_timing)
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
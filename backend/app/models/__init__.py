@@ -6,7 +6,10 @@ from .category import *  # noqa: F403
 from .order import *  # noqa: F403
 from .order_item import *  # noqa: F403
 from .product import *  # noqa: F403
+from .rate_limit import *  # noqa: F403
 from .review import *  # noqa: F403
 from .shared import *  # noqa: F403
 from .stripe import *  # noqa: F403
+from .table_version import *  # noqa: F403
 from .user import *  # noqa: F403
+from .webhook_event import *  # noqa: F403
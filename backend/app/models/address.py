@@ -32,7 +32,9 @@ class AddressUpdate(AddressBase):
 
 # Database model, database table inferred from class name
 class Address(AddressBase, BaseTable, table=True):
-    customer_id: uuid.UUID = Field(foreign_key="user.id", ondelete="CASCADE")
+    customer_id: uuid.UUID = Field(
+        foreign_key="user.id", ondelete="CASCADE", index=True
+    )
     customer: User = Relationship(back_populates="addresses")
 
 
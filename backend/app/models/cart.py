@@ -1,7 +1,7 @@
 import uuid
 from typing import TYPE_CHECKING
 
-from sqlmodel import Field, Relationship, SQLModel
+from sqlmodel import Field, Index, Relationship, SQLModel
 
 from .cart_item import CartItem
 from .shared import BaseTable
@@ -27,6 +27,11 @@ class CartUpdate(CartBase):
 
 # Database model, database table inferred from class name
 class Cart(CartBase, BaseTable, table=True):
+    __table_args__ = (
+        Index("ix_cart_created_at_id", "created_at", "id"),
+        Index("ix_cart_customer_id_created_at_id", "customer_id", "created_at", "id"),
+    )
+
     customer_id: uuid.UUID = Field(foreign_key="user.id", ondelete="CASCADE")
     customer: "User" = Relationship(back_populates="cart")
     cart_items: list[CartItem] = Relationship(
@@ -41,4 +46,5 @@ class CartPublic(CartBase, BaseTable):
 
 class CartsPublic(SQLModel):
     data: list[CartPublic]
-    count: int
+    count: int | None
+    next_cursor: str | None = None
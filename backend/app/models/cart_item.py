@@ -27,10 +27,10 @@ class CartItemUpdate(CartItemBase):
 
 # Database model, database table inferred from class name
 class CartItem(CartItemBase, BaseTable, table=True):
-    cart_id: uuid.UUID = Field(foreign_key="cart.id")
+    cart_id: uuid.UUID = Field(foreign_key="cart.id", index=True)
     cart: "Cart" = Relationship(back_populates="cart_items")
     product_id: uuid.UUID | None = Field(
-        foreign_key="product.id", nullable=True, ondelete="SET NULL"
+        foreign_key="product.id", nullable=True, ondelete="SET NULL", index=True
     )
     product: Product = Relationship(cascade_delete=False)
 
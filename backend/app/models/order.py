@@ -1,13 +1,14 @@
 import uuid
 from decimal import Decimal
 from enum import StrEnum
+from typing import Any
 
 from pydantic_extra_types.currency_code import ISO4217
-from sqlmodel import Column, Enum, Field, Relationship, SQLModel
+from sqlmodel import Column, Enum, Field, Index, Relationship, SQLModel
 
 from .address import Address
 from .order_item import OrderItem
-from .shared import BaseTable
+from .shared import NOW_FACTORY, BaseTable
 from .user import User
 
 
@@ -49,13 +50,31 @@ class OrderUpdate(OrderBase):
 
 # Database model, database table inferred from class name
 class Order(OrderBase, BaseTable, table=True):
+    # Range partitioned by month, app.core.partitions manages the partitions.
+    # The database key has to include created_at, rows are still identified
+    # by id alone.
+    __table_args__ = (
+        Index("ix_order_created_at_id", "created_at", "id"),
+        Index("ix_order_customer_id_created_at_id", "customer_id", "created_at", "id"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+    __mapper_args__: dict[str, Any] = {
+        **BaseTable.__mapper_args__,
+        "primary_key": ["id"],
+    }
+
+    created_at: int = Field(default_factory=NOW_FACTORY, primary_key=True)
+
     customer_id: uuid.UUID | None = Field(
         foreign_key="user.id", nullable=True, ondelete="SET NULL"
     )
     customer: User | None = Relationship(back_populates="orders")
-    shipping_address_id: uuid.UUID | None = Field(foreign_key="address.id")
+    shipping_address_id: uuid.UUID | None = Field(foreign_key="address.id", index=True)
     shipping_address: Address | None = Relationship()
-    items: list[OrderItem] = Relationship(back_populates="order", cascade_delete=True)
+    # referenced through the whole partition key, the database deletes items
+    items: list[OrderItem] = Relationship(
+        back_populates="order", cascade_delete=True, passive_deletes=True
+    )
 
 
 # Properties to return via API, id is always required
@@ -67,4 +86,5 @@ class OrderPublic(OrderBase, BaseTable):
 
 class OrdersPublic(SQLModel):
     data: list[OrderPublic]
-    count: int
+    count: int | None
+    next_cursor: str | None = None
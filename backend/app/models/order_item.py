@@ -1,8 +1,8 @@
 import uuid
 from decimal import Decimal
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 
-from sqlmodel import Field, Relationship, SQLModel
+from sqlmodel import Field, ForeignKeyConstraint, Index, Relationship, SQLModel
 
 from .product import Product
 from .shared import BaseTable
@@ -29,10 +29,27 @@ class OrderItemUpdate(OrderItemBase):
 
 # Database model, database table inferred from class name
 class OrderItem(OrderItemBase, BaseTable, table=True):
-    order_id: uuid.UUID = Field(foreign_key="order.id", ondelete="CASCADE")
+    # Partitioned like Order and on the order's creation time, so the items
+    # of an order share its month and are archived together with it
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["order_id", "order_created_at"],
+            ["order.id", "order.created_at"],
+            ondelete="CASCADE",
+        ),
+        Index("ix_orderitem_order_id_order_created_at", "order_id", "order_created_at"),
+        {"postgresql_partition_by": "RANGE (order_created_at)"},
+    )
+    __mapper_args__: dict[str, Any] = {
+        **BaseTable.__mapper_args__,
+        "primary_key": ["id"],
+    }
+
+    order_id: uuid.UUID
+    order_created_at: int = Field(primary_key=True)
     order: "Order" = Relationship(back_populates="items")
     product_id: uuid.UUID | None = Field(
-        foreign_key="product.id", nullable=True, ondelete="SET NULL"
+        foreign_key="product.id", nullable=True, ondelete="SET NULL", index=True
     )
     product: Product = Relationship()
 
@@ -2,7 +2,18 @@ from decimal import Decimal
 from typing import TYPE_CHECKING
 
 from pydantic_extra_types.currency_code import ISO4217
-from sqlmodel import ARRAY, Column, Field, Relationship, SQLModel, String
+from sqlalchemy import Computed, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlmodel import (
+    ARRAY,
+    Column,
+    Field,
+    Index,
+    Integer,
+    Relationship,
+    SQLModel,
+    String,
+)
 
 from .category import Category
 from .shared import BaseTable, ProductCategoryLink
@@ -10,6 +21,13 @@ from .shared import BaseTable, ProductCategoryLink
 if TYPE_CHECKING:
     from .review import Review
 
+# One histogram bucket per half star, from 0 to 5 stars
+RATING_BUCKETS = 11
+
+
+def empty_rating_histogram() -> list[int]:
+    return [0] * RATING_BUCKETS
+
 
 # Shared properties
 class ProductBase(SQLModel):
@@ -27,8 +45,27 @@ class ProductCreate(ProductBase):
     pass
 
 
+# Review aggregates, maintained alongside review writes
+class ProductRating(SQLModel):
+    rating_avg: float = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    rating_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    rating_histogram: list[int] = Field(default_factory=empty_rating_histogram)
+
+
 # Database model, database table inferred from class name
-class Product(ProductBase, BaseTable, table=True):
+class Product(ProductBase, ProductRating, BaseTable, table=True):
+    __table_args__ = (
+        Index("ix_product_created_at_id", "created_at", "id"),
+        Index("ix_product_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_product_currency_price", "currency", "price"),
+        Index(
+            "ix_product_in_stock_created_at_id",
+            "created_at",
+            "id",
+            postgresql_where=text("available_quantity > 0"),
+        ),
+    )
+
     categories: list[Category] = Relationship(
         back_populates="products", link_model=ProductCategoryLink
     )
@@ -36,13 +73,37 @@ class Product(ProductBase, BaseTable, table=True):
     images: list[str] | None = Field(
         sa_column=Column(ARRAY(String), nullable=True), default=None
     )
+    rating_histogram: list[int] = Field(
+        default_factory=empty_rating_histogram,
+        sa_column=Column(
+            ARRAY(Integer, zero_indexes=True),
+            nullable=False,
+            server_default="{" + ",".join("0" * RATING_BUCKETS) + "}",
+        ),
+    )
+    # Generated by postgres from name and description, never written by the app
+    search_vector: str | None = Field(
+        default=None,
+        exclude=True,
+        repr=False,
+        sa_column=Column(
+            TSVECTOR,
+            Computed(
+                "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+                "setweight(to_tsvector('english', coalesce(description, '')), 'B')",
+                persisted=True,
+            ),
+            nullable=True,
+        ),
+    )
 
 
 # Properties to return via API, id is always required
-class ProductPublic(ProductBase, BaseTable):
+class ProductPublic(ProductBase, ProductRating, BaseTable):
     categories: list[Category]
 
 
 class ProductsPublic(SQLModel):
     data: list[ProductPublic]
-    count: int
+    count: int | None
+    next_cursor: str | None = None
@@ -0,0 +1,11 @@
+from sqlmodel import Field, SQLModel
+
+
+# Token buckets of the shared rate limiter, see app.core.ratelimit. Unlogged,
+# losing them in a crash only resets the limits.
+class RateLimitBucket(SQLModel, table=True):
+    __table_args__ = {"prefixes": ["UNLOGGED"]}
+
+    key: str = Field(primary_key=True, max_length=255)
+    # epoch seconds at which the bucket is full again
+    full_at: float
@@ -1,15 +1,22 @@
 import uuid
+from enum import StrEnum
 
-from sqlmodel import Field, Relationship, SQLModel
+from sqlmodel import Field, Index, Relationship, SQLModel
 
 from .product import Product
 from .shared import BaseTable
 from .user import User
 
 
+class ReviewSort(StrEnum):
+    NEWEST = "newest"
+    HIGHEST = "highest"
+    LOWEST = "lowest"
+
+
 # Shared properties
 class ReviewBase(SQLModel):
-    rating: float = Field(le=5)
+    rating: float = Field(ge=0, le=5)
     content: str | None = Field(default=None, min_length=1, max_length=255)
 
 
@@ -20,13 +27,18 @@ class ReviewCreate(ReviewBase):
 
 # Properties to receive on review update
 class ReviewUpdate(ReviewBase):
-    rating: float | None = Field(default=None, le=5)  # type: ignore
+    rating: float | None = Field(default=None, ge=0, le=5)  # type: ignore
 
 
 # Database model, database table inferred from class name
 class Review(ReviewBase, BaseTable, table=True):
+    __table_args__ = (
+        Index("ix_review_product_id_created_at_id", "product_id", "created_at", "id"),
+        Index("ix_review_product_id_rating_id", "product_id", "rating", "id"),
+    )
+
     customer_id: uuid.UUID | None = Field(
-        foreign_key="user.id", nullable=True, ondelete="SET NULL"
+        foreign_key="user.id", nullable=True, ondelete="SET NULL", index=True
     )
     customer: User | None = Relationship(back_populates="reviews")
     product_id: uuid.UUID = Field(
@@ -44,3 +56,4 @@ class ReviewPublic(ReviewBase, BaseTable):
 class ReviewsPublic(SQLModel):
     data: list[ReviewPublic]
     count: int
+    next_cursor: str | None = None
@@ -1,9 +1,12 @@
 import uuid
+from collections.abc import Callable
 from datetime import UTC, datetime
 
-from sqlmodel import Field, SQLModel
+from sqlmodel import Field, Index, SQLModel
 
-NOW_FACTORY = lambda: datetime.now(UTC).timestamp()  # noqa: E731
+from app.core.ids import uuid7
+
+NOW_FACTORY: Callable[[], int] = lambda: int(datetime.now(UTC).timestamp())  # noqa: E731
 
 
 # Generic message
@@ -11,8 +14,49 @@ class Message(SQLModel):
     message: str
 
 
+class CacheStats(SQLModel):
+    size: int
+    maxsize: int
+    hits: int
+    misses: int
+    evictions: int
+
+
+class HistogramStats(SQLModel):
+    # cumulative counts keyed by upper bound in seconds, "+Inf" last
+    buckets: dict[str, int]
+    count: int
+    sum: float
+
+
+class WorkerPoolStats(SQLModel):
+    workers: int
+    # submitted calls not finished yet, queued and running
+    pending: int
+    max_pending: int
+    completed: int
+    duration: HistogramStats
+
+
+class PoolStats(SQLModel):
+    size: int
+    checked_out: int
+    checked_in: int
+    overflow: int
+    max_overflow: int
+    connections_opened: int
+    connections_closed: int
+    checkout_wait: HistogramStats
+
+
 class BaseTable(SQLModel):
-    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    # Fetch server-generated columns with INSERT/UPDATE ... RETURNING during
+    # the flush instead of expiring them for a later SELECT
+    __mapper_args__ = {"eager_defaults": True}
+
+    # Time-ordered so inserts append to the primary key index. Rows created
+    # before the switch keep their uuid4 ids, the column type is unchanged.
+    id: uuid.UUID = Field(default_factory=uuid7, primary_key=True)
     created_at: int = Field(default_factory=NOW_FACTORY)
     updated_at: int | None = Field(
         default_factory=NOW_FACTORY, sa_column_kwargs={"onupdate": NOW_FACTORY}
@@ -20,8 +64,16 @@ class BaseTable(SQLModel):
 
 
 class ProductCategoryLink(BaseTable, table=True):
+    __table_args__ = (
+        Index(
+            "ix_productcategorylink_category_id_product_id",
+            "category_id",
+            "product_id",
+        ),
+    )
+
     product_id: uuid.UUID | None = Field(
-        default=None, foreign_key="product.id", primary_key=True
+        default=None, foreign_key="product.id", primary_key=True, index=True
     )
     category_id: uuid.UUID | None = Field(
         default=None, foreign_key="category.id", primary_key=True
@@ -0,0 +1,16 @@
+from sqlalchemy import BigInteger
+from sqlmodel import Field, SQLModel
+
+
+# Change counters of the catalog tables, see app.api.deps.TableETag. A
+# table's version is its row here plus its rows in tablechange.
+class TableVersion(SQLModel, table=True):
+    table_name: str = Field(primary_key=True, max_length=63)
+    version: int = Field(default=0, sa_type=BigInteger)
+
+
+# One row per transaction that wrote a catalog table, inserted by a trigger.
+# Now and then a writer folds a table's rows into its TableVersion.
+class TableChange(SQLModel, table=True):
+    table_name: str = Field(primary_key=True, max_length=63)
+    xact_id: int = Field(primary_key=True, sa_type=BigInteger)
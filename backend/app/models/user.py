@@ -1,7 +1,7 @@
 from typing import TYPE_CHECKING
 
 from pydantic import EmailStr
-from sqlmodel import Field, Relationship, SQLModel
+from sqlmodel import Field, Index, Relationship, SQLModel
 
 from .shared import BaseTable
 
@@ -49,6 +49,8 @@ class UpdatePassword(SQLModel):
 
 # Database model, database table inferred from class name
 class User(UserBase, BaseTable, table=True):
+    __table_args__ = (Index("ix_user_created_at_id", "created_at", "id"),)
+
     hashed_password: str
     orders: list["Order"] = Relationship(
         back_populates="customer", cascade_delete=False
@@ -69,4 +71,5 @@ class UserPublic(UserBase, BaseTable):
 
 class UsersPublic(SQLModel):
     data: list[UserPublic]
-    count: int
+    count: int | None
+    next_cursor: str | None = None
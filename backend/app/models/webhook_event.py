@@ -0,0 +1,46 @@
+from enum import StrEnum
+from typing import Any
+
+from sqlalchemy import JSON, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlmodel import Column, Enum, Field, Index
+
+from .shared import BaseTable
+
+
+class WebhookEventStatus(StrEnum):
+    PENDING = "pending"
+    PROCESSING = "processing"
+    DONE = "done"
+    DEAD = "dead"
+
+
+# Stripe events acknowledged by /webhook and processed later by
+# app.webhook_inbox. Stripe delivers at least once, its event id is unique.
+class WebhookEvent(BaseTable, table=True):
+    __table_args__ = (
+        Index(
+            "ix_webhookevent_due",
+            "next_attempt_at",
+            postgresql_where=text("status IN ('PENDING', 'PROCESSING')"),
+        ),
+    )
+
+    stripe_id: str = Field(unique=True, max_length=255)
+    type: str = Field(max_length=255)
+    payload: dict[str, Any] = Field(
+        sa_column=Column(JSON().with_variant(JSONB, "postgresql"), nullable=False)
+    )
+    status: WebhookEventStatus = Field(
+        default=WebhookEventStatus.PENDING,
+        sa_column=Column(
+            Enum(WebhookEventStatus),
+            nullable=False,
+            default=WebhookEventStatus.PENDING,
+        ),
+    )
+    attempts: int = Field(default=0)
+    # epoch seconds after which the event may be claimed, a claim pushes it
+    # out by the lease so events of a crashed worker are picked up again
+    next_attempt_at: int
+    last_error: str | None = Field(default=None)
@@ -3,6 +3,8 @@ import uuid
 from loguru import logger
 from sqlmodel import Session, select
 
+from app import crud
+from app.core.cache import invalidate_product
 from app.errors import ResourceNotFoundError
 from app.models import Product, ProductCreate
 
@@ -13,9 +15,8 @@ class ProductService:
 
     def add(self, product_in: ProductCreate) -> Product:
         db_item = Product.model_validate(product_in)
-        self.session.add(db_item)
-        self.session.commit()
-        self.session.refresh(db_item)
+        crud.save(session=self.session, db_obj=db_item)
+        invalidate_product(db_item.id)
         return db_item
 
     def update(
@@ -48,9 +49,8 @@ class ProductService:
 
         update_data = product_in.model_dump(exclude_unset=True)
         db_item.sqlmodel_update(update_data)
-        self.session.add(db_item)
-        self.session.commit()
-        self.session.refresh(db_item)
+        crud.save(session=self.session, db_obj=db_item)
+        invalidate_product(db_item.id)
         return db_item
 
     def remove(self, id: uuid.UUID | None = None, stripe_id: str | None = None):
@@ -72,3 +72,4 @@ class ProductService:
 
         self.session.delete(db_item)
         self.session.commit()
+        invalidate_product(db_item.id)
@@ -0,0 +1,74 @@
+import uuid
+from collections.abc import AsyncGenerator
+from decimal import Decimal
+from typing import Annotated
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import crud
+from app.api.deps import get_read_db
+from app.api.pagination import encode_cursor
+from app.api.routes.products import product_etag, search_statements
+from app.core.db import async_engine
+from app.models import ProductCreate
+from app.tests.utils.product import create_random_product
+from app.tests.utils.utils import random_lower_string
+
+
+def test_search_pages_through_tied_ranks(db: Session) -> None:
+    # identical text ranks every product the same
+    word = random_lower_string()
+    ids = {
+        crud.create_product(
+            session=db,
+            product_in=ProductCreate(
+                stripe_id=f"prod_{random_lower_string()}",
+                name=f"{word} {i}",
+                description=f"{word} blend",
+                price=Decimal("9.99"),
+            ),
+        ).id
+        for i in range(5)
+    }
+
+    seen: list[uuid.UUID] = []
+    cursor = None
+    for _ in range(5):
+        count_statement, statement = search_statements(word, limit=2, cursor=cursor)
+        assert db.exec(count_statement).one() == 5
+        rows = db.exec(statement).all()
+        assert len({rank for _, rank in rows}) <= 1
+        seen.extend(product.id for product, _ in rows)
+        if len(rows) < 2:
+            break
+        last_product, last_rank = rows[-1]
+        cursor = encode_cursor(last_rank, last_product.id)
+
+    assert len(seen) == len(ids)
+    assert set(seen) == ids
+
+
+def test_product_etag_changes_with_review_aggregates(db: Session) -> None:
+    async def get_session() -> AsyncGenerator[AsyncSession, None]:
+        async with AsyncSession(async_engine) as session:
+            yield session
+
+    app = FastAPI()
+    app.dependency_overrides[get_read_db] = get_session
+
+    @app.get("/products/{id}")
+    def read_tag(etag: Annotated[str, Depends(product_etag)]) -> str:
+        return etag
+
+    product = create_random_product(db)
+    other = create_random_product(db)
+    with TestClient(app) as client:
+        etag = client.get(f"/products/{product.id}").json()
+        other_etag = client.get(f"/products/{other.id}").json()
+        crud.update_product_rating(session=db, id=product.id, added=4)
+        db.commit()
+        assert client.get(f"/products/{product.id}").json() != etag
+        assert client.get(f"/products/{other.id}").json() == other_etag
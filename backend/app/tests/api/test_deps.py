@@ -0,0 +1,273 @@
+import time
+from collections.abc import AsyncGenerator
+from datetime import timedelta
+from typing import Annotated
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import jwt
+from fastapi import Depends, FastAPI, Request, Response
+from fastapi.testclient import TestClient
+from sqlalchemy import event, text, update
+from sqlmodel import Session, SQLModel, col, create_engine, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import crud
+from app.api.deps import (
+    PRIMARY_UNTIL_COOKIE,
+    TableETag,
+    TokenDep,
+    etag_matches,
+    get_current_user,
+    get_current_user_fresh,
+    get_read_db,
+    get_scopes,
+    get_token_data,
+    is_pinned,
+    load_user,
+    pin_primary,
+)
+from app.core import security
+from app.core.cache import invalidate_user, token_cache, user_cache
+from app.core.db import async_engine, replica_router
+from app.models import Category, Product, ProductCategoryLink, TableChange, User
+from app.tests.utils.product import create_random_category, create_random_product
+from app.tests.utils.user import create_random_user
+from app.tests.utils.utils import random_lower_string
+
+
+def test_etag_matches() -> None:
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('W/"abc", "def"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"def"', '"abc"')
+    assert not etag_matches(None, '"abc"')
+
+
+def test_table_etag_not_modified() -> None:
+    session = AsyncMock()
+    session.exec.return_value = MagicMock()
+    session.exec.return_value.all.return_value = [("category", 3)]
+
+    async def get_session() -> AsyncGenerator[AsyncMock, None]:
+        yield session
+
+    handler = MagicMock(return_value={"ok": True})
+    app = FastAPI()
+    app.dependency_overrides[get_read_db] = get_session
+
+    @app.get("/categories", dependencies=[Depends(TableETag(Category))])
+    def read_categories() -> dict[str, bool]:
+        return handler()  # type: ignore[no-any-return]
+
+    with TestClient(app) as client:
+        r = client.get("/categories")
+        assert r.status_code == 200
+        etag = r.headers["etag"]
+
+        r = client.get("/categories", headers={"If-None-Match": etag})
+        assert r.status_code == 304
+        assert r.headers["etag"] == etag
+        assert not r.content
+        assert handler.call_count == 1
+
+        session.exec.return_value.all.return_value = [("category", 4)]
+        r = client.get("/categories", headers={"If-None-Match": etag})
+        assert r.status_code == 200
+        assert r.headers["etag"] != etag
+
+
+def test_table_etag_changes_with_each_write(db: Session) -> None:
+    async def get_session() -> AsyncGenerator[AsyncSession, None]:
+        async with AsyncSession(async_engine) as session:
+            yield session
+
+    app = FastAPI()
+    app.dependency_overrides[get_read_db] = get_session
+
+    @app.get("/categories")
+    def read_categories(
+        etag: Annotated[str, Depends(TableETag(Category))],
+    ) -> str:
+        return etag
+
+    category = create_random_category(db)
+    with TestClient(app) as client:
+        etag = client.get("/categories").headers["etag"]
+        assert (
+            client.get("/categories", headers={"If-None-Match": etag}).status_code
+            == 304
+        )
+        # both writes land within the same second
+        for color in [random_lower_string(), random_lower_string()]:
+            category.color = color
+            crud.save(session=db, db_obj=category)
+            r = client.get("/categories", headers={"If-None-Match": etag})
+            assert r.status_code == 200
+            assert r.json() == r.headers["etag"] != etag
+            etag = r.headers["etag"]
+
+
+def etag_client(*models: type[SQLModel]) -> TestClient:
+    async def get_session() -> AsyncGenerator[AsyncSession, None]:
+        async with AsyncSession(async_engine) as session:
+            yield session
+
+    app = FastAPI()
+    app.dependency_overrides[get_read_db] = get_session
+
+    @app.get("/tag")
+    def read_tag(etag: Annotated[str, Depends(TableETag(*models))]) -> str:
+        return etag
+
+    return TestClient(app)
+
+
+def test_table_etag_ignores_review_aggregates(db: Session) -> None:
+    product = create_random_product(db)
+    with etag_client(Product, Category, ProductCategoryLink) as client:
+        etag = client.get("/tag").json()
+        crud.update_product_rating(session=db, id=product.id, added=4)
+        db.commit()
+        assert client.get("/tag").json() == etag
+
+        product.price += 1
+        crud.save(session=db, db_obj=product)
+        assert client.get("/tag").json() != etag
+
+
+def test_table_etag_survives_folding_changes(db: Session) -> None:
+    create_random_category(db)
+    with etag_client(Category) as client:
+        etag = client.get("/tag").json()
+        db.execute(text("SELECT fold_table_changes('category')"))
+        db.commit()
+        changes = select(TableChange).where(TableChange.table_name == "category")
+        assert db.exec(changes).first() is None
+        assert client.get("/tag").json() == etag
+
+        create_random_category(db)
+        assert client.get("/tag").json() != etag
+
+
+def test_write_pins_reads_to_primary() -> None:
+    app = FastAPI()
+
+    @app.post("/write")
+    def write(response: Response) -> None:
+        pin_primary(response)
+
+    @app.get("/read")
+    def read(request: Request) -> bool:
+        return is_pinned(request)
+
+    with (
+        patch.object(replica_router, "replicas", [MagicMock()]),
+        TestClient(app) as client,
+    ):
+        assert client.get("/read").json() is False
+        client.post("/write")
+        assert client.get("/read").json() is True
+
+        # a longer pin than a write sets is ignored
+        until = int(time.time()) + 3600
+        client.cookies.set(PRIMARY_UNTIL_COOKIE, str(until))
+        assert client.get("/read").json() is False
+
+
+def test_load_user_from_cache() -> None:
+    engine = create_engine("sqlite://")
+    User.__table__.create(engine)  # type: ignore[attr-defined]
+    user = User(email="cached@example.com", hashed_password="x")
+    with Session(engine) as session:
+        session.add(user)
+        session.commit()
+        id = user.id
+
+    statements: list[str] = []
+    event.listen(
+        engine,
+        "before_cursor_execute",
+        lambda _conn, _cursor, statement, *_: statements.append(statement),
+    )
+    user_cache.clear()
+    with Session(engine) as session:
+        assert load_user(session, id)
+    assert len(statements) == 1
+
+    with Session(engine) as session:
+        cached = load_user(session, id)
+        assert cached
+        assert cached.email == "cached@example.com"
+        assert cached in session
+        cached.full_name = "Cached"
+        session.commit()
+    assert len(statements) == 2
+    assert statements[-1].startswith("UPDATE")
+
+    invalidate_user(id)
+    with Session(engine) as session:
+        reloaded = load_user(session, id)
+        assert reloaded
+        assert reloaded.full_name == "Cached"
+    assert len(statements) == 3
+
+
+def test_fresh_user_skips_the_cache(db: Session) -> None:
+    app = FastAPI()
+
+    @app.get("/cached")
+    def cached(user: Annotated[User, Depends(get_current_user)]) -> str:
+        return user.hashed_password
+
+    @app.get("/fresh")
+    def fresh(user: Annotated[User, Depends(get_current_user_fresh)]) -> str:
+        return user.hashed_password
+
+    user = create_random_user(db)
+    token = security.create_access_token(user.id, timedelta(minutes=5), [])
+    headers = {"Authorization": f"Bearer {token}"}
+    old_hash = user.hashed_password
+    with TestClient(app) as client:
+        assert client.get("/cached", headers=headers).json() == old_hash
+
+        # changed by another worker, whose invalidation never arrived here
+        statement = update(User).where(col(User.id) == user.id)
+        db.execute(statement.values(hashed_password="new"))
+        db.commit()
+        assert client.get("/cached", headers=headers).json() == old_hash
+        assert client.get("/fresh", headers=headers).json() == "new"
+
+        db.execute(statement.values(is_active=False))
+        db.commit()
+        assert client.get("/fresh", headers=headers).status_code == 401
+        assert client.get("/cached", headers=headers).status_code == 401
+
+
+def test_token_decoded_once() -> None:
+    app = FastAPI()
+
+    def get_sub(request: Request, token: TokenDep) -> str | None:
+        return get_token_data(request, token).sub
+
+    @app.get("/whoami")
+    def whoami(
+        scopes: Annotated[list[str], Depends(get_scopes)],
+        sub: Annotated[str | None, Depends(get_sub)],
+    ) -> dict[str, object]:
+        return {"sub": sub, "scopes": scopes}
+
+    token = security.create_access_token("abc", timedelta(minutes=5), ["me"])
+    headers = {"Authorization": f"Bearer {token}"}
+    token_cache.clear()
+    with (
+        TestClient(app) as client,
+        patch("app.api.deps.jwt.decode", wraps=jwt.decode) as decode,
+    ):
+        r = client.get("/whoami", headers=headers)
+        assert r.json() == {"sub": "abc", "scopes": ["me"]}
+        assert decode.call_count == 1
+
+        # later requests with the same token hit the process cache
+        r = client.get("/whoami", headers=headers)
+        assert r.status_code == 200
+        assert decode.call_count == 1
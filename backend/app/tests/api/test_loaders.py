@@ -0,0 +1,28 @@
+from sqlmodel import select
+
+from app.api.loaders import load_options, with_loaders
+from app.models import (
+    CartPublic,
+    CartsPublic,
+    Order,
+    OrderPublic,
+    OrdersPublic,
+    ProductPublic,
+    ProductsPublic,
+    UserPublic,
+)
+
+
+def test_list_models_share_item_loaders() -> None:
+    assert load_options(ProductsPublic) == load_options(ProductPublic)
+    assert load_options(CartsPublic) == load_options(CartPublic)
+    assert load_options(OrdersPublic) == load_options(OrderPublic)
+
+
+def test_unregistered_model_has_no_loaders() -> None:
+    assert load_options(UserPublic) == ()
+
+
+def test_with_loaders_joins_many_to_one() -> None:
+    statement = with_loaders(select(Order), OrdersPublic)
+    assert "JOIN address" in str(statement)
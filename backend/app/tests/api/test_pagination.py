@@ -0,0 +1,103 @@
+import asyncio
+import uuid
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi import HTTPException
+from sqlmodel import Session, create_engine, select
+
+from app.api.pagination import (
+    decode_cursor,
+    encode_cursor,
+    paginate,
+    paginate_async,
+)
+from app.models import Review
+
+
+def test_cursor_round_trip() -> None:
+    id = uuid.uuid4()
+    assert decode_cursor(encode_cursor(1735689600, id)) == (1735689600, id)
+
+
+def test_rank_cursor_round_trip() -> None:
+    id = uuid.uuid4()
+    rank = 0.06079270690679550
+    assert decode_cursor(encode_cursor(rank, id), float) == (rank, id)
+
+
+def test_decode_invalid_cursor() -> None:
+    with pytest.raises(HTTPException) as ex:
+        decode_cursor("not-a-cursor")
+    assert ex.value.status_code == 400
+
+
+def test_paginate_descending_cursor() -> None:
+    id = uuid.uuid4()
+    review = Review(id=id, rating=4.5, product_id=uuid.uuid4(), created_at=1)
+    session = MagicMock()
+    session.exec.return_value.all.return_value = [review]
+
+    page = paginate(
+        session,
+        select(Review),
+        Review,
+        limit=1,
+        cursor=encode_cursor(5.0, uuid.uuid4()),
+        key=Review.rating,
+        descending=True,
+    )
+
+    statement = str(session.exec.call_args.args[0])
+    assert "(review.rating, review.id) <" in statement
+    assert "ORDER BY review.rating DESC, review.id DESC" in statement
+    assert page.next_cursor
+    assert decode_cursor(page.next_cursor, float) == (4.5, id)
+
+
+def test_paginate_async_offset() -> None:
+    session = AsyncMock()
+    session.exec.return_value = MagicMock()
+    session.exec.return_value.all.return_value = []
+
+    page = asyncio.run(
+        paginate_async(session, select(Review), Review, skip=10, limit=5)
+    )
+
+    statement = str(session.exec.call_args.args[0])
+    assert "ORDER BY review.created_at, review.id" in statement
+    assert "OFFSET" in statement
+    assert page.rows == []
+    assert page.next_cursor is None
+    assert page.count is None
+
+
+def test_paginate_include_count() -> None:
+    engine = create_engine("sqlite://")
+    Review.__table__.create(engine)  # type: ignore[attr-defined]
+    product_id = uuid.uuid4()
+    with Session(engine) as session:
+        for i in range(5):
+            session.add(Review(rating=i, product_id=product_id, created_at=i))
+        session.add(Review(rating=5, product_id=uuid.uuid4(), created_at=5))
+        session.commit()
+
+        statement = select(Review).where(Review.product_id == product_id)
+        page = paginate(session, statement, Review, limit=2, include_count=True)
+        assert [review.rating for review in page.rows] == [0, 1]
+        assert page.count == 5
+
+        page = paginate(
+            session,
+            statement,
+            Review,
+            limit=2,
+            cursor=page.next_cursor,
+            include_count=True,
+        )
+        assert [review.rating for review in page.rows] == [2, 3]
+        assert page.count == 5
+
+        page = paginate(session, statement, Review, skip=10, include_count=True)
+        assert page.rows == []
+        assert page.count == 5
@@ -0,0 +1,115 @@
+from collections.abc import Generator
+from unittest.mock import patch
+
+import pytest
+from fastapi import Depends, FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.api.ratelimit import (
+    RateLimit,
+    client_host,
+    client_ip,
+    json_email,
+    path_email,
+)
+from app.core.config import settings
+from app.core.db import async_engine
+from app.core.ratelimit import MemoryBackend, PostgresBackend
+from app.tests.utils.utils import random_lower_string
+
+
+@pytest.fixture
+def limited() -> Generator[TestClient, None, None]:
+    app = FastAPI()
+    by_email = RateLimit("test", [(path_email("email"), "2/minute")])
+    by_body = RateLimit(
+        "body", [(client_ip, "5/minute"), (json_email("email"), "1/minute")]
+    )
+
+    @app.post("/recover/{email}", dependencies=[Depends(by_email)])
+    def recover(email: str) -> str:
+        return email
+
+    @app.post("/signup", dependencies=[Depends(by_body)])
+    def signup(body: dict[str, str]) -> dict[str, str]:
+        return body
+
+    with (
+        patch.object(settings, "RATE_LIMIT_ENABLED", True),
+        patch("app.api.ratelimit.backend", MemoryBackend()),
+    ):
+        yield TestClient(app)
+
+
+def test_rate_limit_path_email(limited: TestClient) -> None:
+    assert limited.post("/recover/a@example.com").status_code == 200
+    assert limited.post("/recover/A@Example.com").status_code == 200
+    r = limited.post("/recover/a@example.com")
+    assert r.status_code == 429
+    assert 0 < int(r.headers["Retry-After"]) <= 30
+    assert limited.post("/recover/b@example.com").status_code == 200
+
+
+def test_rate_limit_json_email(limited: TestClient) -> None:
+    assert limited.post("/signup", json={"email": "a@example.com"}).status_code == 200
+    assert limited.post("/signup", json={"email": "a@example.com"}).status_code == 429
+    # per IP limit, the rejected request didn't take a token
+    statuses = [
+        limited.post("/signup", json={"email": f"{i}@example.com"}).status_code
+        for i in range(5)
+    ]
+    assert statuses == [200, 200, 200, 200, 429]
+
+
+def test_rate_limit_oversized_email() -> None:
+    app = FastAPI()
+    by_email = RateLimit("test", [(path_email("email"), "1/minute")])
+
+    @app.post("/recover/{email}", dependencies=[Depends(by_email)])
+    def recover(email: str) -> str:
+        return email
+
+    email = f"{random_lower_string() * 10}@example.com"
+    with (
+        patch.object(settings, "RATE_LIMIT_ENABLED", True),
+        patch("app.api.ratelimit.backend", PostgresBackend(async_engine)),
+        TestClient(app) as client,
+    ):
+        assert client.post(f"/recover/{email}").status_code == 200
+        assert client.post(f"/recover/{email}").status_code == 429
+
+
+def test_rate_limit_disabled(limited: TestClient) -> None:
+    with patch.object(settings, "RATE_LIMIT_ENABLED", False):
+        for _ in range(3):
+            assert limited.post("/recover/a@example.com").status_code == 200
+
+
+def make_request(peer: str, *forwarded_for: str) -> Request:
+    headers = [(b"x-forwarded-for", value.encode()) for value in forwarded_for]
+    return Request({"type": "http", "client": (peer, 1234), "headers": headers})
+
+
+@pytest.mark.parametrize(
+    ("trusted", "peer", "forwarded_for", "host"),
+    [
+        # not behind a trusted proxy, the header is ignored
+        (["127.0.0.1"], "203.0.113.7", ["198.51.100.1"], "203.0.113.7"),
+        (["10.0.0.0/8"], "10.0.0.2", ["198.51.100.1, 203.0.113.7"], "203.0.113.7"),
+        # chained proxies are skipped from the right
+        (
+            ["10.0.0.0/8"],
+            "10.0.0.2",
+            ["198.51.100.1, 203.0.113.7, 10.0.0.3"],
+            "203.0.113.7",
+        ),
+        (["10.0.0.0/8"], "10.0.0.2", ["198.51.100.1", "203.0.113.7"], "203.0.113.7"),
+        (["*"], "10.0.0.2", ["198.51.100.1, 203.0.113.7"], "198.51.100.1"),
+        (["10.0.0.0/8"], "10.0.0.2", [], "10.0.0.2"),
+    ],
+)
+def test_client_host(
+    trusted: list[str], peer: str, forwarded_for: list[str], host: str
+) -> None:
+    with patch.object(settings, "FORWARDED_ALLOW_IPS", trusted):
+        assert client_host(make_request(peer, *forwarded_for)) == host
@@ -0,0 +1,71 @@
+import uuid
+from unittest.mock import patch
+
+from app.core.cache import (
+    LRUCache,
+    handle_invalidation,
+    invalidate_product,
+    invalidate_user,
+    product_cache,
+    user_cache,
+)
+from app.core.channels import RESET, LocalChannel
+
+
+def test_lru_cache_evicts_least_recently_used() -> None:
+    cache: LRUCache[str, int] = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+    stats = cache.stats()
+    assert stats.size == 2
+    assert stats.hits == 3
+    assert stats.misses == 1
+    assert stats.evictions == 1
+
+
+def test_lru_cache_expires_entries() -> None:
+    cache: LRUCache[str, int] = LRUCache(maxsize=2, ttl=10)
+    with patch("app.core.cache.time.monotonic", return_value=100.0):
+        cache.set("a", 1)
+    with patch("app.core.cache.time.monotonic", return_value=105.0):
+        assert cache.get("a") == 1
+    with patch("app.core.cache.time.monotonic", return_value=111.0):
+        assert cache.get("a") is None
+    assert cache.stats().size == 0
+
+
+def test_invalidate_product() -> None:
+    id = uuid.uuid4()
+    product = object()
+    product_cache.set(id, product)  # type: ignore
+    assert product_cache.get(id) is product
+    invalidate_product(id)
+    assert product_cache.get(id) is None
+
+
+def test_invalidate_user() -> None:
+    id = uuid.uuid4()
+    other_id = uuid.uuid4()
+    user_cache.set(str(id), object())  # type: ignore
+    user_cache.set(str(other_id), object())  # type: ignore
+    invalidate_user(id)
+    assert user_cache.get(str(id)) is None
+    assert user_cache.get(str(other_id)) is not None
+
+    handle_invalidation(RESET)
+    assert user_cache.get(str(other_id)) is None
+
+
+def test_local_channel_dispatches_to_subscribers() -> None:
+    channel = LocalChannel()
+    received: list[str] = []
+    channel.subscribe(received.append)
+    channel.publish("user:1")
+    assert received == ["user:1"]
@@ -0,0 +1,49 @@
+import time
+import uuid
+from collections.abc import Generator
+from unittest.mock import patch
+
+import pytest
+
+from app.core import ids
+from app.core.ids import uuid7, uuid7_timestamp
+
+
+@pytest.fixture(autouse=True)
+def generator_state() -> Generator[None, None, None]:
+    # keep fake clocks from leaking future timestamps into later tests
+    with patch.object(ids, "_last_ms", 0), patch.object(ids, "_counter", 0):
+        yield
+
+
+def test_uuid7_layout() -> None:
+    before = time.time()
+    id = uuid7()
+    after = time.time()
+
+    assert id.version == 7
+    assert id.variant == uuid.RFC_4122
+    timestamp = uuid7_timestamp(id)
+    assert timestamp is not None
+    assert before - 0.001 <= timestamp <= after
+
+
+def test_uuid7_is_monotonic_within_a_millisecond() -> None:
+    with patch("app.core.ids.time.time_ns", return_value=2_000_000_000_000_000_000):
+        ids = [uuid7() for _ in range(10_000)]
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+    # counter overflow borrows from the next millisecond
+    assert uuid7_timestamp(ids[-1]) > uuid7_timestamp(ids[0])  # type: ignore[operator]
+
+
+def test_uuid7_survives_clock_going_back() -> None:
+    with patch("app.core.ids.time.time_ns", return_value=3_000_000_000_000_000_000):
+        first = uuid7()
+    with patch("app.core.ids.time.time_ns", return_value=2_999_000_000_000_000_000):
+        second = uuid7()
+    assert second > first
+
+
+def test_uuid7_timestamp_ignores_uuid4() -> None:
+    assert uuid7_timestamp(uuid.uuid4()) is None
@@ -0,0 +1,75 @@
+from datetime import UTC, date, datetime
+from decimal import Decimal
+
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app import crud
+from app.core.partitions import (
+    Partition,
+    add_months,
+    create_partitions,
+    default_rows_in,
+    month_bounds,
+    month_of,
+    parse_partition,
+    partition_name,
+)
+from app.models import Order, OrderItem
+from app.tests.utils.product import create_random_product
+from app.tests.utils.user import create_random_user
+
+
+def test_add_months_wraps_years() -> None:
+    assert add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+    assert add_months(date(2026, 1, 1), -24) == date(2024, 1, 1)
+
+
+def test_month_bounds_are_contiguous() -> None:
+    start, end = month_bounds(date(2026, 2, 1))
+    assert start == int(datetime(2026, 2, 1, tzinfo=UTC).timestamp())
+    assert end == int(datetime(2026, 3, 1, tzinfo=UTC).timestamp())
+    assert month_bounds(date(2026, 3, 1))[0] == end
+    assert month_of(end - 1) == date(2026, 2, 1)
+    assert month_of(end) == date(2026, 3, 1)
+
+
+def test_parse_partition() -> None:
+    name = partition_name("order", date(2026, 10, 1))
+    assert name == "order_2026_10"
+    assert parse_partition("order", name) == Partition("order", name, date(2026, 10, 1))
+    assert parse_partition("order", "orderitem_2026_10") is None
+    assert parse_partition("order", "order_default") is None
+
+
+def test_create_partitions_moves_default_rows(db: Session) -> None:
+    # past every partition the migrations and init_db create
+    month = date(2037, 6, 1)
+    order = Order(
+        total_price=Decimal("9.99"),
+        customer_id=create_random_user(db).id,
+        shipping_address_id=None,
+        created_at=month_bounds(month)[0] + 60,
+    )
+    crud.save(session=db, db_obj=order)
+    item = OrderItem(
+        order=order,
+        product_id=create_random_product(db).id,
+        final_price=Decimal("9.99"),
+    )
+    crud.save(session=db, db_obj=item)
+
+    conn = db.connection()
+    located = text("SELECT tableoid::regclass::text FROM orderitem WHERE id = :id")
+    assert conn.execute(located, {"id": item.id}).scalar_one() == "orderitem_default"
+    try:
+        names = create_partitions(conn, month)
+        assert names == ["order_2037_06", "orderitem_2037_06"]
+        assert conn.execute(located, {"id": item.id}).scalar_one() == names[1]
+        assert not default_rows_in(conn, "order", month)
+        assert create_partitions(conn, month) == names
+    finally:
+        db.rollback()
+    db.delete(order)
+    db.commit()
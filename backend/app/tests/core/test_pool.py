@@ -0,0 +1,36 @@
+from sqlalchemy import create_engine, text
+
+from app.core.pool import Histogram, InstrumentedQueuePool, pool_stats
+
+
+def test_histogram_cumulative_buckets() -> None:
+    histogram = Histogram((0.01, 0.1))
+    for value in (0.005, 0.05, 0.05, 3):
+        histogram.observe(value)
+
+    stats = histogram.stats()
+    assert stats.buckets == {"0.01": 1, "0.1": 3, "+Inf": 4}
+    assert stats.count == 4
+    assert round(stats.sum, 3) == 3.105
+
+
+def test_pool_stats() -> None:
+    engine = create_engine(
+        "sqlite://", poolclass=InstrumentedQueuePool, pool_size=1, max_overflow=1
+    )
+    with engine.connect() as first, engine.connect() as second:
+        first.execute(text("select 1"))
+        second.execute(text("select 1"))
+        stats = pool_stats(engine.pool)  # type: ignore[arg-type]
+        assert stats.checked_out == 2
+        assert stats.overflow == 1
+        assert stats.connections_opened == 2
+
+    stats = pool_stats(engine.pool)  # type: ignore[arg-type]
+    assert stats.checked_out == 0
+    # the overflow connection is closed on checkin, the pooled one is kept
+    assert stats.connections_closed == 1
+    assert stats.checked_in == 1
+    assert stats.checkout_wait.count == 2
+    engine.dispose()
+    assert pool_stats(engine.pool).connections_opened == 2  # type: ignore[arg-type]
@@ -0,0 +1,95 @@
+import asyncio
+import uuid
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.config import settings
+from app.core.ratelimit import WAIT, MemoryBackend, PostgresBackend, Rate
+
+
+def test_parse_rate() -> None:
+    assert Rate.parse("5/minute") == Rate(5, 60)
+    assert Rate.parse("1/day").interval == 86400
+
+
+@pytest.mark.parametrize("value", ["5", "0/minute", "-1/hour", "5/fortnight"])
+def test_parse_invalid_rate(value: str) -> None:
+    with pytest.raises(ValueError):
+        Rate.parse(value)
+
+
+def test_memory_backend_limits_burst() -> None:
+    backend = MemoryBackend()
+    rate = Rate(3, 60)
+
+    async def take() -> list[float]:
+        return [await backend.acquire([("ip:1.2.3.4", rate)]) for _ in range(4)]
+
+    with patch("app.core.ratelimit.time.time", return_value=1000.0):
+        waits = asyncio.run(take())
+    assert waits[:3] == [0, 0, 0]
+    assert waits[3] == pytest.approx(20)
+
+
+def test_memory_backend_refills() -> None:
+    backend = MemoryBackend()
+    rate = Rate(2, 60)
+    with patch("app.core.ratelimit.time.time") as now:
+        now.return_value = 1000.0
+        asyncio.run(backend.acquire([("k", rate)]))
+        asyncio.run(backend.acquire([("k", rate)]))
+        assert asyncio.run(backend.acquire([("k", rate)])) > 0
+        # a rejected request doesn't take a token
+        now.return_value = 1030.0
+        assert asyncio.run(backend.acquire([("k", rate)])) == 0
+        assert asyncio.run(backend.acquire([("k", rate)])) > 0
+        assert asyncio.run(backend.acquire([("other", rate)])) == 0
+
+
+def test_memory_backend_evicts_least_recent() -> None:
+    backend = MemoryBackend(maxsize=2)
+    rate = Rate(10, 60)
+    for key in ["a", "b", "a", "c"]:
+        asyncio.run(backend.acquire([(key, rate)]))
+    assert list(backend._full_at) == ["a", "c"]
+
+
+def test_memory_backend_takes_all_or_none() -> None:
+    backend = MemoryBackend()
+    wide, narrow = Rate(10, 60), Rate(1, 60)
+    with patch("app.core.ratelimit.time.time", return_value=1000.0):
+        assert asyncio.run(backend.acquire([("ip", wide), ("email", narrow)])) == 0
+        assert asyncio.run(backend.acquire([("ip", wide), ("email", narrow)])) > 0
+    # the rejected request left the ip bucket alone
+    assert backend._full_at["ip"] == 1006.0
+
+
+def test_postgres_backend_takes_all_or_none() -> None:
+    wide, narrow = Rate(10, 60), Rate(1, 60)
+    prefix = f"test:{uuid.uuid4()}"
+
+    async def take() -> tuple[float, float, float]:
+        engine = create_async_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+        backend = PostgresBackend(engine, prune_rate=0)
+        try:
+            first = await backend.acquire(
+                [(f"{prefix}:a", wide), (f"{prefix}:b", narrow)]
+            )
+            second = await backend.acquire(
+                [(f"{prefix}:a", wide), (f"{prefix}:b", narrow)]
+            )
+            async with engine.connect() as conn:
+                wide_wait = (
+                    await conn.execute(WAIT, {"key": f"{prefix}:a"})
+                ).scalar_one()
+        finally:
+            await engine.dispose()
+        return first, second, wide_wait
+
+    first, second, wide_wait = asyncio.run(take())
+    assert first == 0
+    assert second > 0
+    # "a" is locked first, only the admitted request kept its token
+    assert wide_wait == pytest.approx(wide.interval, abs=1)
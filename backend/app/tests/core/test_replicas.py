@@ -0,0 +1,66 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from fastapi.testclient import TestClient
+
+from app.core.replicas import ReplicaRouter
+from app.main import app
+
+
+def make_router(replicas: int = 2) -> ReplicaRouter:
+    return ReplicaRouter(
+        MagicMock(name="primary"),
+        [MagicMock(name=f"replica_{i}") for i in range(replicas)],
+        max_lag=5,
+        check_interval=60,
+    )
+
+
+def test_choose_healthy_replica() -> None:
+    router = make_router()
+    router.replicas[0].healthy = False
+    router.replicas[1].lag = 1
+
+    async def check(replica: object) -> None:
+        pass
+
+    router.check = check  # type: ignore[method-assign]
+    engine = asyncio.run(router.choose())
+    assert engine is router.replicas[1].engine
+
+
+def test_choose_primary_when_replicas_lag() -> None:
+    router = make_router()
+    for replica in router.replicas:
+        replica.lag = 30
+
+    async def check(replica: object) -> None:
+        pass
+
+    router.check = check  # type: ignore[method-assign]
+    assert asyncio.run(router.choose()) is router.primary
+
+
+def test_choose_primary_when_asked() -> None:
+    router = make_router()
+    assert asyncio.run(router.choose(primary=True)) is router.primary
+
+
+def test_unreachable_replica_marked_unhealthy() -> None:
+    router = make_router(1)
+    engine: MagicMock = router.replicas[0].engine  # type: ignore[assignment]
+    engine.connect.side_effect = OSError("connection refused")
+
+    assert asyncio.run(router.choose()) is router.primary
+    assert not router.replicas[0].healthy
+
+
+def test_shutdown_disposes_replica_engines() -> None:
+    replicas = [AsyncMock(name=f"replica_{i}") for i in range(2)]
+    with (
+        patch("app.main.replica_engines", replicas),
+        TestClient(app),
+    ):
+        pass
+    for replica in replicas:
+        replica.dispose.assert_awaited_once()
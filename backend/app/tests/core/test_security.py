@@ -0,0 +1,36 @@
+from app.core import hashing
+from app.core.security import PasswordPool
+
+
+def test_password_pool_inline() -> None:
+    pool = PasswordPool(workers=0, rounds=4)
+    hashed = pool.run(hashing.hash_password, "secret")
+    assert pool.run(hashing.verify_password, "secret", hashed)
+    assert not pool.run(hashing.verify_password, "wrong", hashed)
+    assert pool.stats().completed == 0
+
+
+def test_password_pool_processes() -> None:
+    pool = PasswordPool(workers=1, rounds=4)
+    try:
+        hashed = pool.run(hashing.hash_password, "secret")
+        assert pool.run(hashing.verify_password, "secret", hashed)
+    finally:
+        pool.shutdown()
+
+    stats = pool.stats()
+    assert stats.completed == 2
+    assert stats.pending == 0
+    assert stats.max_pending == 1
+    assert stats.duration.count == 2
+
+
+def test_verify_and_update_rehashes_on_cost_change() -> None:
+    old = hashing.hash_password("secret", rounds=4)
+    assert hashing.verify_and_update("secret", old, rounds=4) == (True, None)
+
+    valid, new_hash = hashing.verify_and_update("secret", old, rounds=5)
+    assert valid
+    assert new_hash
+    assert hashing.verify_and_update("secret", new_hash, rounds=5) == (True, None)
+    assert hashing.verify_and_update("wrong", old, rounds=5) == (False, None)
@@ -0,0 +1,60 @@
+import json
+import uuid
+from pathlib import Path
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.core.slow_queries import SlowQueryLog, redact
+from app.core.timing import server_timing, track_queries
+
+
+def test_redact_parameters() -> None:
+    id = uuid.uuid4()
+    params = {"email_1": "user@example.com", "id_1": id, "limit": 10, "tags": ["a"]}
+    assert redact(params) == {
+        "email_1": "<str len=16>",
+        "id_1": id,
+        "limit": 10,
+        "tags": ["<str len=1>"],
+    }
+
+
+def test_slow_query_tagged_with_route(tmp_path: Path) -> None:
+    path = tmp_path / "slow.jsonl"
+    # explain_rate=1 also covers a failing EXPLAIN, which sqlite doesn't support
+    slow_query_log = SlowQueryLog(str(path), threshold_ms=0, explain_rate=1)
+
+    engine = create_engine("sqlite://")
+    track_queries(engine)
+
+    def generate_unique_id(route: APIRoute) -> str:
+        return f"{route.tags[0]}-{route.name}"
+
+    app = FastAPI(generate_unique_id_function=generate_unique_id)
+    app.middleware("http")(server_timing)
+
+    @app.get("/products", tags=["products"])
+    def read_products() -> str:
+        with engine.connect() as connection:
+            return str(
+                connection.execute(
+                    text("select :name"), {"name": "secret"}
+                ).scalar_one()
+            )
+
+    with (
+        patch("app.core.timing.slow_query_log", slow_query_log),
+        TestClient(app) as client,
+    ):
+        assert client.get("/products").status_code == 200
+
+    entries = [json.loads(line) for line in path.read_text().splitlines()]
+    entry = next(e for e in entries if e["statement"] == "select ?")
+    assert entry["route"] == "products-read_products"
+    assert entry["parameters"] == ["<str len=6>"]
+    assert entry["plan"] is None
+    assert entry["duration_ms"] >= 0
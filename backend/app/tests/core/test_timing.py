@@ -0,0 +1,55 @@
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.core.timing import QueryStats, server_timing, track_queries
+
+
+def make_app() -> FastAPI:
+    engine = create_engine("sqlite://")
+    track_queries(engine)
+
+    app = FastAPI()
+    app.middleware("http")(server_timing)
+
+    @app.get("/sync")
+    def sync_route() -> int:
+        with engine.connect() as connection:
+            connection.execute(text("select 1"))
+            return int(connection.execute(text("select 2")).scalar_one())
+
+    return app
+
+
+def test_server_timing_header() -> None:
+    with TestClient(make_app()) as client:
+        r = client.get("/sync")
+    assert r.status_code == 200
+    db, total = r.headers["server-timing"].split(", ")
+    assert db.startswith("db;dur=")
+    assert db.endswith(';desc="2 queries"')
+    assert total.startswith("total;dur=")
+
+
+def test_slow_request_logs_statements() -> None:
+    with (
+        patch("app.core.timing.settings.SLOW_REQUEST_QUERIES", 1),
+        patch("app.core.timing.logger") as logger,
+        TestClient(make_app()) as client,
+    ):
+        client.get("/sync")
+    kwargs = logger.warning.call_args.kwargs
+    assert kwargs["queries"] == 2
+    assert "1x" in kwargs["statements"]
+    assert "select 2" in kwargs["statements"]
+
+
+def test_query_stats_summary() -> None:
+    stats = QueryStats()
+    stats.record("select a", 0.001)
+    stats.record("select b", 0.003)
+    stats.record("select a", 0.001)
+    assert stats.count == 3
+    assert stats.summary() == [("select b", 1, 0.003), ("select a", 2, 0.002)]
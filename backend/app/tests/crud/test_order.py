@@ -0,0 +1,27 @@
+from decimal import Decimal
+
+from sqlmodel import Session, select
+
+from app import crud
+from app.models import Order, OrderItem
+from app.tests.utils.product import create_random_product
+from app.tests.utils.user import create_random_user
+
+
+def test_order_items_reference_their_order(db: Session) -> None:
+    user = create_random_user(db)
+    product = create_random_product(db)
+    order = Order(
+        total_price=Decimal("9.99"), customer_id=user.id, shipping_address_id=None
+    )
+    crud.save(session=db, db_obj=order)
+    item = OrderItem(order=order, product_id=product.id, final_price=Decimal("9.99"))
+    crud.save(session=db, db_obj=item)
+    assert item.order_id == order.id
+    assert item.order_created_at == order.created_at
+
+    item_id = item.id
+    db.delete(order)
+    db.commit()
+    statement = select(OrderItem).where(OrderItem.id == item_id)
+    assert db.exec(statement).first() is None
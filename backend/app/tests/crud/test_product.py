@@ -0,0 +1,83 @@
+import uuid
+from decimal import Decimal
+
+import pytest
+from sqlmodel import Session
+
+from app import crud
+from app.errors import MissingResourcesError
+from app.models import Product, ProductCreate
+from app.tests.utils.product import create_random_category, create_random_product
+from app.tests.utils.utils import random_lower_string
+
+
+def test_assign_product_categories(db: Session) -> None:
+    product = create_random_product(db)
+    other_product = create_random_product(db)
+    category = create_random_category(db)
+    other_category = create_random_category(db)
+
+    crud.assign_product_categories(
+        session=db,
+        assignments={
+            product.id: [category.id, other_category.id],
+            other_product.id: [category.id],
+        },
+    )
+    db.refresh(product)
+    db.refresh(other_product)
+    assert {c.id for c in product.categories} == {category.id, other_category.id}
+    assert [c.id for c in other_product.categories] == [category.id]
+
+    crud.assign_product_categories(
+        session=db, assignments={product.id: [other_category.id]}
+    )
+    db.refresh(product)
+    assert [c.id for c in product.categories] == [other_category.id]
+
+
+def test_assign_product_categories_missing_category(db: Session) -> None:
+    product = create_random_product(db)
+    missing = uuid.uuid4()
+    with pytest.raises(MissingResourcesError) as ex:
+        crud.assign_product_categories(session=db, assignments={product.id: [missing]})
+    assert ex.value.resource == "Category"
+    assert ex.value.ids == [missing]
+
+
+def test_bulk_upsert_products(db: Session) -> None:
+    products_in = [
+        ProductCreate(
+            stripe_id=f"prod_{random_lower_string()}",
+            name=random_lower_string(),
+            price=Decimal("9.99"),
+        )
+        for _ in range(3)
+    ]
+    ids = crud.bulk_upsert_products(session=db, products_in=products_in)
+    assert len(ids) == 3
+
+    products_in[1].price = Decimal("4.50")
+    assert crud.bulk_upsert_products(session=db, products_in=products_in) == ids
+
+    product = db.get(Product, ids[1])
+    assert product
+    db.refresh(product)
+    assert product.stripe_id == products_in[1].stripe_id
+    assert product.price == Decimal("4.50")
+
+
+def test_bulk_upsert_products_last_duplicate_wins(db: Session) -> None:
+    stripe_id = f"prod_{random_lower_string()}"
+    products_in = [
+        ProductCreate(stripe_id=stripe_id, name=random_lower_string(), price=price)
+        for price in (Decimal("1.00"), Decimal("2.00"))
+    ]
+    ids = crud.bulk_upsert_products(session=db, products_in=products_in)
+    assert len(ids) == 1
+
+    product = db.get(Product, ids[0])
+    assert product
+    db.refresh(product)
+    assert product.name == products_in[1].name
+    assert product.price == Decimal("2.00")
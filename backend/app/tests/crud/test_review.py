@@ -0,0 +1,91 @@
+from sqlmodel import Session
+
+from app import crud
+from app.models import ReviewCreate
+from app.tests.utils.product import create_random_product
+from app.tests.utils.user import create_random_user
+
+
+def test_rating_bucket() -> None:
+    assert crud.rating_bucket(0) == 0
+    assert crud.rating_bucket(2.5) == 5
+    assert crud.rating_bucket(4.9) == 10
+    assert crud.rating_bucket(5) == 10
+
+
+def test_create_product_review_updates_aggregates(db: Session) -> None:
+    user = create_random_user(db)
+    product = create_random_product(db)
+    for rating in (4, 5, 4.5):
+        crud.create_product_review(
+            session=db,
+            review_in=ReviewCreate(rating=rating),
+            product=product.id,
+            customer=user.id,
+        )
+
+    db.refresh(product)
+    assert product.rating_count == 3
+    assert product.rating_avg == 4.5
+    assert product.rating_histogram[8] == 1
+    assert product.rating_histogram[9] == 1
+    assert product.rating_histogram[10] == 1
+
+
+def test_update_product_rating_removes_review(db: Session) -> None:
+    user = create_random_user(db)
+    product = create_random_product(db)
+    review = crud.create_product_review(
+        session=db,
+        review_in=ReviewCreate(rating=3),
+        product=product.id,
+        customer=user.id,
+    )
+
+    crud.update_product_rating(session=db, id=product.id, removed=review.rating)
+    db.commit()
+    db.refresh(product)
+    assert product.rating_count == 0
+    assert product.rating_avg == 0
+    assert sum(product.rating_histogram) == 0
+
+
+def test_recompute_product_ratings(db: Session) -> None:
+    user = create_random_user(db)
+    product = create_random_product(db)
+    for rating in (1, 2):
+        crud.create_product_review(
+            session=db,
+            review_in=ReviewCreate(rating=rating),
+            product=product.id,
+            customer=user.id,
+        )
+
+    crud.recompute_product_ratings(session=db)
+    db.refresh(product)
+    assert product.rating_count == 2
+    assert product.rating_avg == 1.5
+    assert product.rating_histogram[2] == 1
+    assert product.rating_histogram[4] == 1
+
+
+def test_bulk_create_reviews(db: Session) -> None:
+    user = create_random_user(db)
+    product = create_random_product(db)
+    other_product = create_random_product(db)
+    ids = crud.bulk_create_reviews(
+        session=db,
+        reviews_in={
+            product.id: [ReviewCreate(rating=4), ReviewCreate(rating=5)],
+            other_product.id: [ReviewCreate(rating=2)],
+        },
+        customer=user.id,
+    )
+    assert len(ids) == 3
+
+    db.refresh(product)
+    db.refresh(other_product)
+    assert product.rating_count == 2
+    assert product.rating_avg == 4.5
+    assert other_product.rating_count == 1
+    assert other_product.rating_histogram[4] == 1
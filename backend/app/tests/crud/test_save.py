@@ -0,0 +1,47 @@
+import uuid
+
+from sqlalchemy import event
+from sqlmodel import Session, create_engine
+
+from app import crud
+from app.models import Review, ReviewPublic
+
+
+def test_save_without_refresh() -> None:
+    engine = create_engine("sqlite://")
+    Review.__table__.create(engine)  # type: ignore[attr-defined]
+    statements: list[str] = []
+    event.listen(
+        engine,
+        "before_cursor_execute",
+        lambda _conn, _cursor, statement, *_: statements.append(statement),
+    )
+
+    with Session(engine, expire_on_commit=False) as session:
+        review = crud.save(
+            session=session, db_obj=Review(rating=4, product_id=uuid.uuid4())
+        )
+        assert review.rating == 4
+        assert review.created_at
+        review.rating = 5
+        crud.save(session=session, db_obj=review)
+        assert review.updated_at
+
+    assert [s.split()[0] for s in statements] == ["INSERT", "UPDATE"]
+
+
+def test_saved_row_validates_as_public() -> None:
+    engine = create_engine("sqlite://")
+    Review.__table__.create(engine)  # type: ignore[attr-defined]
+
+    with Session(engine, expire_on_commit=False) as session:
+        review = crud.save(
+            session=session, db_obj=Review(rating=4, product_id=uuid.uuid4())
+        )
+        review.rating = 5
+        crud.save(session=session, db_obj=review)
+
+    public = ReviewPublic.model_validate(review)
+    assert public.rating == 5
+    assert isinstance(public.created_at, int)
+    assert isinstance(public.updated_at, int)
@@ -0,0 +1,112 @@
+from collections.abc import Generator
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy import Engine
+from sqlmodel import Session, create_engine, select
+
+from app import crud
+from app.models import WebhookEvent, WebhookEventStatus
+from app.webhook_inbox import WebhookInbox
+
+
+@pytest.fixture
+def inbox_engine() -> Generator[Engine, None, None]:
+    engine = create_engine("sqlite://")
+    WebhookEvent.__table__.create(engine)  # type: ignore[attr-defined]
+    yield engine
+    engine.dispose()
+
+
+def add_event(engine: Engine, stripe_id: str, next_attempt_at: int = 0) -> None:
+    payload: dict[str, Any] = {"id": stripe_id, "type": "product.deleted"}
+    with Session(engine) as session:
+        session.add(
+            WebhookEvent(
+                stripe_id=stripe_id,
+                type="product.deleted",
+                payload=payload,
+                next_attempt_at=next_attempt_at,
+            )
+        )
+        session.commit()
+
+
+def get_event(engine: Engine, stripe_id: str) -> WebhookEvent:
+    with Session(engine) as session:
+        statement = select(WebhookEvent).where(WebhookEvent.stripe_id == stripe_id)
+        return session.exec(statement).one()
+
+
+def test_claim_webhook_event(inbox_engine: Engine) -> None:
+    add_event(inbox_engine, "evt_later", next_attempt_at=50)
+    add_event(inbox_engine, "evt_first", next_attempt_at=10)
+    with Session(inbox_engine) as session:
+        event = crud.claim_webhook_event(session=session, now=100, lease=30)
+        assert event is not None
+        assert event.stripe_id == "evt_first"
+        assert event.status == WebhookEventStatus.PROCESSING
+        assert event.attempts == 1
+        assert event.next_attempt_at == 130
+
+        event = crud.claim_webhook_event(session=session, now=100, lease=60)
+        assert event is not None and event.stripe_id == "evt_later"
+        assert crud.claim_webhook_event(session=session, now=100, lease=30) is None
+        # an expired lease makes the event due again
+        event = crud.claim_webhook_event(session=session, now=130, lease=30)
+        assert event is not None
+        assert event.stripe_id == "evt_first"
+        assert event.attempts == 2
+
+
+def test_inbox_processes_event(inbox_engine: Engine) -> None:
+    add_event(inbox_engine, "evt_1")
+    handler = MagicMock()
+    inbox = WebhookInbox(inbox_engine, 1, handler=handler)
+
+    assert inbox.run_once()
+    assert not inbox.run_once()
+    handler.assert_called_once()
+    assert handler.call_args.kwargs["event"].id == "evt_1"
+    event = get_event(inbox_engine, "evt_1")
+    assert event.status == WebhookEventStatus.DONE
+    assert event.attempts == 1
+
+
+def test_inbox_retries_then_dead_letters(inbox_engine: Engine) -> None:
+    add_event(inbox_engine, "evt_1")
+    handler = MagicMock(side_effect=RuntimeError("stripe is down"))
+    inbox = WebhookInbox(
+        inbox_engine, 1, handler=handler, max_attempts=3, retry_delay=10
+    )
+
+    with patch("app.webhook_inbox.time.time") as now:
+        now.return_value = 1000
+        assert inbox.run_once()
+        event = get_event(inbox_engine, "evt_1")
+        assert event.status == WebhookEventStatus.PENDING
+        assert event.next_attempt_at == 1010
+        assert event.last_error == "RuntimeError('stripe is down')"
+        assert not inbox.run_once()
+
+        now.return_value = 1010
+        assert inbox.run_once()
+        assert get_event(inbox_engine, "evt_1").next_attempt_at == 1030
+
+        now.return_value = 1030
+        assert inbox.run_once()
+        event = get_event(inbox_engine, "evt_1")
+        assert event.status == WebhookEventStatus.DEAD
+        assert event.attempts == 3
+
+        now.return_value = 10_000
+        assert not inbox.run_once()
+    assert handler.call_count == 3
+
+
+def test_inbox_backoff_is_capped() -> None:
+    inbox = WebhookInbox(
+        MagicMock(), 1, retry_delay=10, max_retry_delay=60, handler=MagicMock()
+    )
+    assert [inbox.backoff(n) for n in range(1, 6)] == [10, 20, 40, 60, 60]
@@ -0,0 +1,54 @@
+from datetime import UTC, date, datetime
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from app.archive_orders import (
+    LocalArchiveStore,
+    S3ArchiveStore,
+    archive_key,
+    expired_partitions,
+)
+from app.core.partitions import Partition
+
+
+def test_local_archive_store(tmp_path: Path) -> None:
+    source = tmp_path / "order_2024_01.csv.gz"
+    source.write_bytes(b"data")
+    store = LocalArchiveStore(tmp_path / "archive")
+    partition = Partition("order", "order_2024_01", date(2024, 1, 1))
+
+    location = store.put(archive_key(partition), source)
+    assert Path(location) == tmp_path / "archive" / "order" / "order_2024_01.csv.gz"
+    assert Path(location).read_bytes() == b"data"
+
+
+def test_s3_archive_store() -> None:
+    client = MagicMock()
+    store = S3ArchiveStore(client, "bucket", "archive/")
+
+    location = store.put("order/order_2024_01.csv.gz", Path("/tmp/file"))
+    assert location == "s3://bucket/archive/order/order_2024_01.csv.gz"
+    client.upload_file.assert_called_once_with(
+        "/tmp/file", "bucket", "archive/order/order_2024_01.csv.gz"
+    )
+
+
+def test_expired_partitions() -> None:
+    partitions = {
+        table: [
+            Partition(table, f"{table}_2024_09", date(2024, 9, 1), attached=False),
+            Partition(table, f"{table}_2024_10", date(2024, 10, 1)),
+            Partition(table, f"{table}_2024_11", date(2024, 11, 1)),
+        ]
+        for table in ("order", "orderitem")
+    }
+    now = datetime(2026, 10, 18, tzinfo=UTC).timestamp()
+    with patch(
+        "app.archive_orders.list_partitions",
+        side_effect=lambda _, table: partitions[table],
+    ):
+        expired = expired_partitions(MagicMock(), retention_months=24, now=now)
+    assert [p.name for p in expired] == [
+        "orderitem_2024_09",
+        "order_2024_09",
+    ]
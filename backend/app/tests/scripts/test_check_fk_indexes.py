@@ -0,0 +1,13 @@
+from sqlmodel import SQLModel
+
+from app.check_fk_indexes import find_gaps, is_covered, keys_from_metadata
+
+
+def test_is_covered() -> None:
+    assert is_covered(["cart_id"], [["id"], ["cart_id", "created_at"]])
+    assert is_covered(["a", "b"], [["b", "a", "c"]])
+    assert not is_covered(["product_id"], [["id", "product_id", "category_id"]])
+
+
+def test_models_index_foreign_keys() -> None:
+    assert find_gaps(keys_from_metadata(SQLModel.metadata)) == []
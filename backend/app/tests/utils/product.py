@@ -0,0 +1,23 @@
+from decimal import Decimal
+
+from sqlmodel import Session
+
+from app import crud
+from app.models import Category, CategoryCreate, Product, ProductCreate
+from app.tests.utils.utils import random_lower_string
+
+
+def create_random_product(db: Session) -> Product:
+    product_in = ProductCreate(
+        stripe_id=f"prod_{random_lower_string()}",
+        name=random_lower_string(),
+        price=Decimal("9.99"),
+    )
+    return crud.create_product(session=db, product_in=product_in)
+
+
+def create_random_category(db: Session) -> Category:
+    category_in = CategoryCreate(
+        name=random_lower_string(), color=random_lower_string()
+    )
+    return crud.create_category(session=db, category_in=category_in)
@@ -0,0 +1,140 @@
+import threading
+import time
+from collections.abc import Callable
+
+import stripe
+from loguru import logger
+from sqlalchemy import Engine
+from sqlmodel import Session
+
+import app.crud as crud
+from app.core.config import settings
+from app.core.db import engine
+from app.event_handler import EventHandler
+from app.models import WebhookEvent
+
+Handler = Callable[..., None]
+
+
+class WebhookInbox:
+    """
+    A fixed set of threads draining the webhookevent inbox through
+    EventHandler.process, each with its own session.
+
+    Every worker of every node runs its own set, claims don't overlap. A
+    failed event is retried after `retry_delay` seconds, doubling up to
+    `max_retry_delay`, and is marked dead after `max_attempts` attempts.
+    Events are processed at least once, a worker that dies mid-event leaves
+    it to be claimed again when its lease runs out.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        workers: int,
+        *,
+        max_attempts: int = 8,
+        retry_delay: int = 10,
+        max_retry_delay: int = 3600,
+        lease: int = 300,
+        poll_interval: float = 1,
+        handler: Handler = EventHandler.process,
+    ) -> None:
+        self.engine = engine
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.handler = handler
+        self._stopped = threading.Event()
+        self._wake = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    def backoff(self, attempts: int) -> int:
+        return int(min(self.retry_delay * 2 ** (attempts - 1), self.max_retry_delay))
+
+    def notify(self) -> None:
+        """
+        Wake idle workers of this process, others find the event when they
+        next poll.
+        """
+        self._wake.set()
+
+    def run_once(self) -> bool:
+        """
+        Claim and process one due event. Returns False when there was none.
+        """
+        with Session(self.engine, expire_on_commit=False) as session:
+            now = int(time.time())
+            event = crud.claim_webhook_event(session=session, now=now, lease=self.lease)
+            if event is None:
+                return False
+            if event.attempts > self.max_attempts:
+                # its last lease ran out, the worker holding it never finished
+                crud.finish_webhook_event(
+                    session=session, event=event, error="lease expired"
+                )
+                return True
+            self.process(session, event)
+        return True
+
+    def process(self, session: Session, event: WebhookEvent) -> None:
+        try:
+            stripe_event = stripe.Event.construct_from(event.payload, stripe.api_key)
+            self.handler(session=session, event=stripe_event)
+        except Exception as ex:
+            session.rollback()
+            retry_at = None
+            if event.attempts < self.max_attempts:
+                retry_at = int(time.time()) + self.backoff(event.attempts)
+            logger.exception(
+                f"webhook event {event.stripe_id} failed, attempt {event.attempts}"
+            )
+            crud.finish_webhook_event(
+                session=session, event=event, error=repr(ex), retry_at=retry_at
+            )
+            return
+        crud.finish_webhook_event(session=session, event=event)
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stopped.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._work, name=f"webhook-inbox-{i}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def close(self) -> None:
+        self._stopped.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout=self.poll_interval * 2)
+        self._threads = []
+
+    def _work(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                if self.run_once():
+                    continue
+            except Exception:
+                logger.exception("webhook inbox worker failed")
+                self._stopped.wait(self.poll_interval)
+                continue
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+
+webhook_inbox = WebhookInbox(
+    engine,
+    settings.WEBHOOK_WORKERS,
+    max_attempts=settings.WEBHOOK_MAX_ATTEMPTS,
+    retry_delay=settings.WEBHOOK_RETRY_DELAY,
+    max_retry_delay=settings.WEBHOOK_MAX_RETRY_DELAY,
+    lease=settings.WEBHOOK_LEASE,
+    poll_interval=settings.WEBHOOK_POLL_INTERVAL,
+)